@@ -1,27 +1,120 @@
 import httpx
+import orjson
+import asyncio
+import base64
+import gzip
+import hashlib
+import mmap
+import sqlite3
+import logging
 import os, json, shutil
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import itertools
 import re
 import xml.etree.ElementTree as ET
+from lxml import etree
 from fastapi import FastAPI, HTTPException
 from pydantic_settings import BaseSettings
 from typing import List, Optional, Dict, Any
 from llama_index.core import Document
-from llama_index.core.node_parser import SentenceSplitter
+import tiktoken
 from openai import OpenAI
 import chromadb
 import numpy as np
 import faiss
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 
-class Settings(BaseSettings):
+class AppSettings(BaseSettings):
+    # Named AppSettings (not Settings) so it can never shadow or be shadowed
+    # by llama_index.core.Settings if that gets imported later.
     nebius_api_key: str
-    
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
 
-app = FastAPI(title="Felix Spike", version="0.0.1")
+@lru_cache(maxsize=1)
+def get_settings() -> AppSettings:
+    """Parse .env exactly once per process, lazily on first use."""
+    return AppSettings()
+
+
+settings = get_settings()
+
+# Queue-based logger: handlers only enqueue records (non-blocking), while a
+# QueueListener thread started in the lifespan does the formatting and the
+# stderr write. Async endpoints can therefore log without a synchronous
+# syscall holding up the event loop; big payload dumps go to DEBUG so
+# production doesn't even pay the format cost.
+log = logging.getLogger("felix")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One shared AsyncClient for the whole app: connections stay keep-alive
+    # across requests instead of paying a TCP+TLS handshake inside each
+    # handler, and async endpoints can await it without blocking the loop.
+    # httpx pools per host internally, so Nebius and EPMC share the client.
+    # http2=True multiplexes concurrent calls to the same host over one
+    # TCP+TLS session (both Nebius and EPMC speak HTTP/2); h2 ships in the
+    # conda environment.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        # Ask for brotli/gzip responses explicitly; JATS XML compresses
+        # ~10:1 and chat JSON 3-5:1, and httpx decodes transparently
+        # (brotli ships in the conda environment).
+        headers={"Accept-Encoding": "br, gzip"},
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=100, max_keepalive_connections=20, keepalive_expiry=30
+        ),
+    )
+    # Open the persistent Chroma store once at startup. PersistentClient
+    # start-up runs schema checks and loads the HNSW graph, which is cheap
+    # here but grows with the collection — handlers should share these
+    # app.state handles instead of re-opening the sqlite file per request.
+    # (The throwaway test DB in /chroma-test-basic stays per-request on
+    # purpose: that endpoint wipes its directory every call.)
+    app.state.chroma = chromadb.PersistentClient(path=CHROMA_PATH)
+    # HNSW parameters sized for a >100K-chunk scientific corpus rather than
+    # Chroma's small-collection defaults (M=16, construction_ef=100,
+    # search_ef=10). They only take effect at collection creation; changing
+    # M later requires rebuilding the collection.
+    app.state.chroma_collection = app.state.chroma.get_or_create_collection(
+        CHROMA_COLLECTION,
+        metadata={
+            "hnsw:space": "cosine",
+            "hnsw:M": 32,
+            "hnsw:construction_ef": 200,
+            "hnsw:search_ef": 64,
+        },
+    )
+    # Wire the "felix" logger through an in-memory queue; the listener
+    # thread owns the actual stderr handler for the process lifetime.
+    log_queue: SimpleQueue = SimpleQueue()
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    log.addHandler(QueueHandler(log_queue))
+    log.setLevel(logging.INFO)
+    yield
+    # Persist any FAISS rows still only in memory (see _flush_live_index).
+    try:
+        _flush_live_index(os.path.join(FAISS_DIR, "index.faiss"), force=True)
+    except Exception as e:
+        print(f"[FAISS] shutdown flush failed: {e}")
+    await app.state.http.aclose()
+    listener.stop()
+
+
+app = FastAPI(title="Felix Spike", version="0.0.1", lifespan=lifespan)
 
 # ------- Public, non-secret config (hard-coded) -------
 PAPERS_DIR = "papers"
@@ -32,9 +125,53 @@ CHROMA_TEST_PATH = "./chroma_db_test"
 CHROMA_TEST_COLLECTION = "test_basic"
 # FAISS storage directory (index + metadata JSONL)
 FAISS_DIR = "./faiss_store"
-# Configure a single, global splitter. We do not enable embeddings here.
-# chunk_size ~800 tokens with ~120 overlap is a common default for scientific text.
-#SPLITTER = SentenceSplitter(chunk_size=800, chunk_overlap=120)
+# Chunking: a direct tiktoken sliding window instead of a LlamaIndex
+# splitter. chunk_size ~800 tokens with ~120 overlap is a common default for
+# scientific text. Each document is encoded exactly once with the C
+# tokenizer; chunks are token-array slices decoded back to text, skipping
+# the splitter's per-chunk re-tokenization and TextNode object graph.
+_ENC = tiktoken.get_encoding("cl100k_base")
+CHUNK_TOKENS = 800
+CHUNK_OVERLAP = 120
+
+
+class _Chunk:
+    """
+    Minimal chunk node: just the fields the indexing pipeline reads
+    (duck-typed stand-in for the llama_index TextNode it replaces).
+    """
+
+    __slots__ = ("id_", "ref_doc_id", "metadata", "text")
+
+    def __init__(self, id_: str, ref_doc_id: str, metadata: Dict[str, Any], text: str):
+        self.id_ = id_
+        self.ref_doc_id = ref_doc_id
+        self.metadata = metadata
+        self.text = text
+
+    def get_content(self, metadata_mode: str = "none") -> str:
+        return self.text
+
+
+def _split_documents(docs) -> List[_Chunk]:
+    """
+    Sliding-window chunker: CHUNK_TOKENS-token windows advancing by
+    CHUNK_TOKENS - CHUNK_OVERLAP. Ids are deterministic
+    "{doc_id}::chunk-{k}" so re-indexing an unchanged document produces
+    identical ids (the upsert and IDMap2 paths depend on that).
+    """
+    step = CHUNK_TOKENS - CHUNK_OVERLAP
+    nodes: List[_Chunk] = []
+    for doc in docs:
+        toks = _ENC.encode(doc.text, disallowed_special=())
+        for k, i in enumerate(range(0, max(len(toks), 1), step)):
+            window = toks[i:i + CHUNK_TOKENS]
+            if not window:
+                break
+            nodes.append(_Chunk(f"{doc.doc_id}::chunk-{k}", doc.doc_id, doc.metadata, _ENC.decode(window)))
+            if i + CHUNK_TOKENS >= len(toks):
+                break  # this window already reached the end; no tail stub
+    return nodes
 # OpenAI-compatible base URL from Nebius Quickstart (documented).
 # We keep this constant in code (not secret).
 NEBIUS_BASE_URL = "https://api.studio.nebius.com/v1/"  # docs: /v1/chat/completions
@@ -47,6 +184,796 @@ os.environ["OPENAI_API_KEY"] = settings.nebius_api_key
 os.environ["OPENAI_BASE_URL"] = NEBIUS_BASE_URL
 
 
+@lru_cache(maxsize=1)
+def _nebius_client() -> OpenAI:
+    """
+    One OpenAI-SDK client per process. The SDK wraps an httpx.Client with a
+    keep-alive pool, so sharing it across requests (it is thread-safe) reuses
+    TCP+TLS connections instead of paying a fresh ~100-200 ms handshake in
+    every handler that talks to Nebius.
+    """
+    return OpenAI(api_key=settings.nebius_api_key, base_url=NEBIUS_BASE_URL)
+
+
+# Quantization for newly created indexes: fp16 (default) halves vector
+# bytes at ~zero recall cost, sq8 quarters them with a small loss, flat
+# keeps raw float32. Only consulted at creation time — an existing
+# index.faiss keeps whatever format it was created with.
+FAISS_QUANT = os.environ.get("FAISS_QUANT", "fp16").lower()
+
+
+def _new_index(dim: int):
+    """Fresh vector index per the FAISS_QUANT setting (fp16|sq8|flat)."""
+    if FAISS_QUANT == "flat":
+        return faiss.IndexFlatIP(dim)
+    qt = faiss.ScalarQuantizer.QT_8bit if FAISS_QUANT == "sq8" else faiss.ScalarQuantizer.QT_fp16
+    return faiss.IndexScalarQuantizer(dim, qt, faiss.METRIC_INNER_PRODUCT)
+
+
+# Exhaustive (flat/SQ) search is fine up to a few tens of thousands of
+# vectors; past this threshold the index is migrated one-way to
+# OPQ + IVF + PQ for ~50x compression and sub-linear search. PQ64 requires
+# the (possibly truncated) embedding dim to be divisible by 64.
+FAISS_IVFPQ_THRESHOLD = 50_000
+FAISS_FACTORY_LARGE = "OPQ64,IVF4096,PQ64"
+FAISS_NPROBE = 32
+
+
+def _read_faiss_index(path: str):
+    """read_index plus IVF tuning: default nprobe=1 would tank recall."""
+    index = faiss.read_index(path)
+    try:
+        faiss.extract_index_ivf(index).nprobe = FAISS_NPROBE
+    except RuntimeError:
+        pass  # flat/SQ index — nothing to tune
+    return index
+
+
+# Live index shared across batch calls: write_index serializes the whole
+# file (linear in ntotal), so paying it on every /index/batch dominates once
+# the corpus grows. The index is kept in memory between batches and
+# checkpointed to disk — atomically, via tmp file + os.replace — only after
+# FAISS_FLUSH_ROWS new rows, on shutdown (lifespan) or on demand via
+# /index/flush. The skip records for unflushed rows (meta.jsonl lines,
+# indexed_ids.txt entries) are queued in _PENDING_RECORDS and written only
+# by the checkpoint, so a crash loses the vectors and their skip records
+# together and the next run simply re-indexes those documents. Worst case
+# on a crash is therefore redone work, never silently missing vectors.
+_LIVE_INDEX = None
+_LIVE_DIRTY = 0
+FAISS_FLUSH_ROWS = int(os.environ.get("FAISS_FLUSH_ROWS", "50000"))
+
+# Endpoints run on FastAPI's thread pool, so two batch calls (or a batch
+# and a flush) can touch the live index concurrently; faiss add/search on
+# one index object is not safe against that. Every load/add/flush of the
+# live index happens under this lock (reentrant: _flush_live_index locks
+# itself and is also called from sections that already hold it).
+_INDEX_LOCK = threading.RLock()
+
+# Per-batch (node_ids, node_texts, node_metas, doc_ids, start_row) tuples
+# whose vectors are in the live index but not yet checkpointed. Guarded by
+# _INDEX_LOCK; drained by _flush_live_index after a successful write.
+_PENDING_RECORDS: List[tuple] = []
+
+
+def _load_live_index(faiss_path: str):
+    """The in-memory index, loading it from disk on first use (or None)."""
+    global _LIVE_INDEX
+    with _INDEX_LOCK:
+        if _LIVE_INDEX is None and os.path.isfile(faiss_path):
+            _LIVE_INDEX = _read_faiss_index(faiss_path)
+        return _LIVE_INDEX
+
+
+def _set_live_index(index) -> None:
+    global _LIVE_INDEX
+    _LIVE_INDEX = index
+
+
+def _mark_index_dirty(rows: int) -> None:
+    global _LIVE_DIRTY
+    _LIVE_DIRTY += rows
+
+
+# Read-only counterpart for query endpoints in a process that has not run
+# any indexing: loaded with IO_FLAG_MMAP so the kernel pages in only the
+# regions a search touches instead of materializing the whole file in RSS.
+_QUERY_INDEX = None
+
+
+def _load_query_index(faiss_path: str):
+    """
+    Index for search endpoints. Prefers the writable live index when one is
+    in memory (rows from recent batches are visible there before any
+    checkpoint); otherwise mmaps the on-disk file read-only.
+    """
+    global _QUERY_INDEX
+    if _LIVE_INDEX is not None:
+        return _LIVE_INDEX
+    if _QUERY_INDEX is None and os.path.isfile(faiss_path):
+        try:
+            idx = faiss.read_index(faiss_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            try:
+                faiss.extract_index_ivf(idx).nprobe = FAISS_NPROBE
+            except RuntimeError:
+                pass
+            _QUERY_INDEX = idx
+        except Exception as e:
+            # Not every index layout supports mmap; fall back to a RAM load.
+            print(f"[FAISS] mmap load failed ({e}); loading into RAM")
+            _QUERY_INDEX = _read_faiss_index(faiss_path)
+    return _QUERY_INDEX
+
+
+def _flush_live_index(faiss_path: str, *, force: bool = False) -> bool:
+    """
+    Checkpoint the live index if dirty enough (or forced); atomic rename.
+
+    A successful checkpoint also drains _PENDING_RECORDS: meta.jsonl lines
+    and indexed_ids.txt entries must never reach disk before the vectors
+    they describe do, or a crash would leave skip records that permanently
+    suppress re-indexing of rows that were never persisted.
+    """
+    global _LIVE_DIRTY
+    with _INDEX_LOCK:
+        if _LIVE_INDEX is None or _LIVE_DIRTY == 0:
+            return False
+        if not force and _LIVE_DIRTY < FAISS_FLUSH_ROWS:
+            return False
+        tmp_path = faiss_path + ".tmp"
+        faiss.write_index(_LIVE_INDEX, tmp_path)
+        os.replace(tmp_path, faiss_path)  # readers never see a half-written file
+        print(f"[FAISS] checkpointed index: {faiss_path} (ntotal={_LIVE_INDEX.ntotal}, +{_LIVE_DIRTY} rows)")
+        _LIVE_DIRTY = 0
+        _drain_pending_records()
+        return True
+
+
+# GPU workspace is allocated once and reused across batches; None until the
+# first successful clone. Stays None forever on CPU-only builds (faiss-cpu has
+# no get_num_gpus/StandardGpuResources) or hosts without a CUDA device.
+_GPU_RES = None
+
+
+def _gpu_clone(index):
+    """
+    Clone an index to GPU 0 when a CUDA-enabled faiss build and device are
+    present; returns None otherwise so callers just stay on CPU. float16
+    storage on the GPU halves transfer and memory cost at ~zero recall loss.
+    """
+    global _GPU_RES
+    if getattr(faiss, "get_num_gpus", lambda: 0)() <= 0:
+        return None
+    try:
+        if _GPU_RES is None:
+            _GPU_RES = faiss.StandardGpuResources()
+        co = faiss.GpuClonerOptions()
+        co.useFloat16 = True
+        return faiss.index_cpu_to_gpu(_GPU_RES, 0, index, co)
+    except Exception as e:
+        print(f"[FAISS][gpu] clone failed, staying on CPU: {e}")
+        return None
+
+
+def _maybe_upgrade_index(index, tag: str = "[INDEX]"):
+    """
+    Migrate a flat/scalar-quantized index to OPQ64,IVF4096,PQ64 once it
+    outgrows exhaustive search. Training data is reconstructed from the
+    quantized index itself (lossless for flat, near-lossless for fp16).
+    4096 IVF lists ideally want ~160K training points; training on what we
+    have at the 50K threshold is the usual spike tradeoff — recall recovers
+    as later batches add vectors.
+    """
+    if index.ntotal < FAISS_IVFPQ_THRESHOLD:
+        return index
+    # An IDMap2 wrapper carries the stable chunk ids; migrate the inner index
+    # and re-wrap with the same id vector so search keeps returning them.
+    # downcast_index is required: the .index attribute is the SWIG base
+    # proxy, so an isinstance check on it would never see IndexPreTransform
+    # and every batch past the threshold would re-run the full migration.
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap2) else index
+    if isinstance(inner, faiss.IndexPreTransform):
+        return index
+    print(f"{tag}[FAISS] ntotal={index.ntotal} > {FAISS_IVFPQ_THRESHOLD}; migrating to {FAISS_FACTORY_LARGE}")
+    X_all = inner.reconstruct_n(0, inner.ntotal)
+    big = faiss.index_factory(int(inner.d), FAISS_FACTORY_LARGE, faiss.METRIC_INNER_PRODUCT)
+    # OPQ+IVF+PQ training is the expensive step of the migration (minutes of
+    # k-means on CPU at 50K x 1024); run it on GPU when one is available and
+    # copy the trained index back for the adds + write_index.
+    trainer = _gpu_clone(big)
+    if trainer is not None:
+        trainer.train(X_all)
+        big = faiss.index_gpu_to_cpu(trainer)
+    else:
+        big.train(X_all)
+    if isinstance(index, faiss.IndexIDMap2):
+        ids = faiss.vector_to_array(index.id_map)
+        big = faiss.IndexIDMap2(big)
+        big.add_with_ids(X_all, ids)
+    else:
+        big.add(X_all)
+    faiss.extract_index_ivf(big).nprobe = FAISS_NPROBE
+    print(f"{tag}[FAISS] migration done (ntotal={big.ntotal})")
+    return big
+
+
+# Stable 64-bit FAISS ids: new indexes are wrapped in IndexIDMap2 and vectors
+# are added via add_with_ids with a hash of the deterministic node id
+# ("{doc_id}::chunk-{k}"). Search then returns these ids instead of row
+# positions, so metadata can live in a keyed store (meta.db below) and the
+# "line i of meta.jsonl == row i" coupling stops being load-bearing — crashes
+# between index and metadata writes no longer shift every later lookup, and
+# remove_ids makes true updates possible. Indexes created before this change
+# contain plain row positions and keep resolving through meta.jsonl.
+def _faiss_id(node_id: str) -> int:
+    """Deterministic non-negative int64 id for a node id string."""
+    # blake2b, not xxhash: id hashing is nowhere near hot (a few thousand
+    # short strings per batch), and these ids are persisted in the IDMap2
+    # index and meta.db — the digest function is part of the on-disk format
+    # and cannot change without orphaning every stored vector. 8-byte
+    # digest, top bit cleared because FAISS ids are signed.
+    h = hashlib.blake2b(node_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(h, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def _chunk_db() -> sqlite3.Connection:
+    """Open (and create on first use) the keyed chunk-metadata store."""
+    conn = sqlite3.connect(os.path.join(FAISS_DIR, "meta.db"))
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS chunks ("
+        " fid INTEGER PRIMARY KEY,"
+        " id TEXT,"
+        " text TEXT,"
+        " meta TEXT)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_id ON chunks(id)")
+    return conn
+
+
+def _store_chunk_meta(node_ids, node_texts, node_metas) -> None:
+    """Upsert this batch's chunk records keyed by their FAISS id."""
+    conn = _chunk_db()
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO chunks (fid, id, text, meta) VALUES (?, ?, ?, ?)",
+            [
+                (_faiss_id(_id), _id, _txt, orjson.dumps(_meta).decode())
+                for _id, _txt, _meta in zip(node_ids, node_texts, node_metas)
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _fetch_chunk_meta(fids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Fetch chunk records for FAISS ids; returns {fid: {id, text, meta}}."""
+    records: Dict[int, Dict[str, Any]] = {}
+    if not fids:
+        return records
+    conn = _chunk_db()
+    try:
+        for i in range(0, len(fids), 500):  # sqlite parameter limit
+            chunk = fids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT fid, id, text, meta FROM chunks WHERE fid IN ({marks})", chunk
+            )
+            for fid, _id, _txt, _meta in rows:
+                records[fid] = {"id": _id, "text": _txt, "meta": orjson.loads(_meta)}
+    finally:
+        conn.close()
+    return records
+
+
+# Sidecar offset index for meta.jsonl: one little-endian uint64 per line,
+# holding the byte offset where that line starts. Lets the legacy (row-
+# aligned) lookup path seek straight to the top_k lines it needs instead of
+# JSON-parsing the whole file per query. Writers append to it alongside the
+# JSONL; files from before the sidecar existed are indexed once on demand
+# with a newline scan (bytes-level, no JSON parsing).
+def _append_meta_offsets(meta_path: str, base: int, parts: List[bytes]) -> None:
+    """Record the start offset of each newly appended JSONL line."""
+    starts = np.empty(len(parts), dtype="<u8")
+    pos = base
+    for i, p in enumerate(parts):
+        starts[i] = pos
+        pos += len(p)
+    with open(meta_path + ".idx", "ab") as f:
+        f.write(starts.tobytes())
+
+
+def _ensure_meta_offsets(meta_path: str):
+    """The offset sidecar as a read-only memmap, (re)building it if absent
+    or out of step with the JSONL (e.g. rows appended by an older version)."""
+    idx_path = meta_path + ".idx"
+    meta_size = os.path.getsize(meta_path)
+    entries = os.path.getsize(idx_path) // 8 if os.path.isfile(idx_path) else 0
+    ok = False
+    if entries > 0:
+        last = int(np.memmap(idx_path, dtype="<u8", mode="r")[-1])
+        if last < meta_size:
+            # In sync only if the last recorded offset starts the *final*
+            # line, i.e. from there to EOF is exactly one newline-terminated
+            # line. Merely checking last < meta_size would also pass for
+            # every stale sidecar, hiding all rows appended since.
+            with open(meta_path, "rb") as f:
+                f.seek(last)
+                tail = f.read()
+            ok = tail.endswith(b"\n") and tail.count(b"\n") == 1
+    if not ok:
+        starts = [0]
+        with open(meta_path, "rb") as f:
+            pos = 0
+            for buf in iter(lambda: f.read(1 << 20), b""):
+                k = buf.find(b"\n")
+                while k != -1:
+                    starts.append(pos + k + 1)
+                    k = buf.find(b"\n", k + 1)
+                pos += len(buf)
+        if starts and starts[-1] >= meta_size:
+            starts.pop()  # the final newline starts no line
+        np.array(starts, dtype="<u8").tofile(idx_path)
+    return np.memmap(idx_path, dtype="<u8", mode="r")
+
+
+def _meta_jsonl_rows(meta_path: str, idx_list: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Parse only the requested line numbers via the offset sidecar + mmap."""
+    records: Dict[int, Dict[str, Any]] = {}
+    offsets = _ensure_meta_offsets(meta_path)
+    n = len(offsets)
+    with open(meta_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            size = mm.size()
+            for i in idx_list:
+                if 0 <= i < n:
+                    start = int(offsets[i])
+                    end = int(offsets[i + 1]) if i + 1 < n else size
+                    records[i] = orjson.loads(mm[start:end])
+        finally:
+            mm.close()
+    return records
+
+
+def _resolve_hits(q_index, idx_list: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Map one search's FAISS output to metadata records ({idx: record}).
+
+    IDMap2-backed indexes return the stable chunk ids assigned at add time;
+    those resolve through the keyed sqlite store. Legacy indexes return row
+    positions, which resolve through meta.jsonl — seeking to just the
+    requested lines via the offset sidecar rather than parsing every line.
+    """
+    if hasattr(q_index, "id_map"):
+        return _fetch_chunk_meta([i for i in idx_list if i >= 0])
+    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
+    if not os.path.isfile(meta_path):
+        return {}
+    return _meta_jsonl_rows(meta_path, idx_list)
+
+
+# Doc-level skip list: ids of documents whose chunks were already added in a
+# previous batch. Overlapping offset/limit windows (or a re-run of
+# /index/run_all) then drop those docs before any splitting or hashing —
+# the chunk-level content-hash skip still exists but only kicks in after
+# the full split. One id per line, append-only. A paper whose text changed
+# needs its id removed from the file (or the file deleted) to be re-indexed.
+INDEXED_IDS_PATH = os.path.join(FAISS_DIR, "indexed_ids.txt")
+
+
+def _load_indexed_ids() -> set:
+    ids = set()
+    if os.path.isfile(INDEXED_IDS_PATH):
+        with open(INDEXED_IDS_PATH, "r", encoding="utf-8") as f:
+            ids = set(f.read().split())
+    # Docs whose rows sit in the live index awaiting a checkpoint count as
+    # indexed for this process, even though their file entry is deferred.
+    with _INDEX_LOCK:
+        for _, _, _, doc_ids, _ in _PENDING_RECORDS:
+            ids.update(doc_ids)
+    return ids
+
+
+def _record_indexed_ids(doc_ids) -> None:
+    """Append newly indexed doc ids; single buffered write."""
+    if not doc_ids:
+        return
+    with open(INDEXED_IDS_PATH, "a", encoding="utf-8") as f:
+        f.write("".join(f"{d}\n" for d in doc_ids))
+
+
+def _queue_batch_records(node_ids, node_texts, node_metas, doc_ids, start_row: int) -> None:
+    """
+    Queue one batch's meta.jsonl/parquet/indexed-id records until the next
+    index checkpoint (caller holds _INDEX_LOCK). Persisting them earlier
+    would let the doc-level and content-hash skips outlive vectors that a
+    crash discards — and, on legacy positional indexes, shift every later
+    row→metadata lookup.
+    """
+    _PENDING_RECORDS.append(
+        (list(node_ids), list(node_texts), list(node_metas), list(doc_ids), start_row)
+    )
+
+
+def _drain_pending_records() -> None:
+    """Persist queued batch records; called right after a checkpoint."""
+    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
+    while _PENDING_RECORDS:
+        node_ids, node_texts, node_metas, doc_ids, start_row = _PENDING_RECORDS[0]
+        parts = [
+            orjson.dumps(
+                {"id": _id, "text": _txt, "meta": _meta},
+                option=orjson.OPT_APPEND_NEWLINE,
+            )
+            for _id, _txt, _meta in zip(node_ids, node_texts, node_metas)
+        ]
+        with open(meta_path, "ab") as f:
+            base = f.tell()
+            f.write(b"".join(parts))
+        _append_meta_offsets(meta_path, base, parts)
+        print(f"[FAISS] Appended metadata JSONL: {meta_path} (+{len(node_ids)} lines)")
+        # Columnar copy (best-effort: query paths never depend on it)
+        try:
+            _write_meta_parquet(node_ids, node_texts, node_metas, start_row)
+        except Exception as e:
+            print(f"[FAISS][parquet write warn] {e}")
+        _record_indexed_ids(doc_ids)
+        _PENDING_RECORDS.pop(0)  # only once every write for this batch landed
+
+
+# Content-addressed embedding cache: a sqlite KV keyed on
+# blake2b(model + "\n" + text) with vectors stored as raw float32 bytes
+# (no JSON overhead). Lives beside the other local stores.
+EMBED_CACHE_PATH = "./.embedcache.db"
+
+
+def _embed_cache_key(model: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model}\n{text}".encode("utf-8"), digest_size=16).digest()
+
+
+# Ask the OpenAI-compatible API for base64-packed embeddings: the response
+# then carries raw little-endian float32 bytes instead of a JSON array of
+# 4096 numbers, so deserialization is one b64decode + np.frombuffer with no
+# Python float objects created. Set NEBIUS_EMBED_B64=0 if the server ever
+# rejects the parameter.
+EMBED_B64 = os.environ.get("NEBIUS_EMBED_B64", "1") != "0"
+
+
+def _decode_embedding(e) -> np.ndarray:
+    """Decode one API embedding — base64 string or plain float list."""
+    if isinstance(e, str):
+        return np.frombuffer(base64.b64decode(e), dtype=np.float32)
+    return np.asarray(e, dtype=np.float32)
+
+
+def _embed_texts(
+    client: OpenAI,
+    texts: List[str],
+    model: str,
+    *,
+    batch_size: int = 96,   # z.B. 64–128; 96 ist ein guter Start
+    concurrency: int = 8,   # in-flight Nebius requests; keeps us under rate limits
+) -> List[np.ndarray]:
+    """
+    Batched Nebius embedding with bounded fan-out and per-batch retries.
+
+    The batches are independent POSTs; they are overlapped in a bounded
+    thread pool (the OpenAI client is thread-safe). pool.map preserves
+    input order, so the returned vectors stay aligned with `texts`.
+    """
+    starts = list(range(0, len(texts), batch_size))
+    total_batches = len(starts)
+
+    def _embed_batch(start: int) -> List[List[float]]:
+        batch = texts[start:start + batch_size]
+        batch_num = start // batch_size + 1
+        if batch_num == 1 or batch_num % 10 == 0 or batch_num == total_batches:
+            print(f"[EMB] batch {batch_num}/{total_batches} (+{len(batch)} texts)")
+        # Simple exponential backoff so a transient Nebius 429/5xx doesn't
+        # abort a multi-hundred-batch indexing run.
+        use_b64 = EMBED_B64
+        for attempt in range(3):
+            try:
+                kwargs = {"encoding_format": "base64"} if use_b64 else {}
+                resp = client.embeddings.create(model=model, input=batch, **kwargs)
+                return [_decode_embedding(item.embedding) for item in resp.data]
+            except Exception as exc:
+                if use_b64 and attempt == 0:
+                    # First failure might be the server rejecting
+                    # encoding_format; drop it for the remaining attempts.
+                    use_b64 = False
+                    print(f"[EMB][retry] batch {batch_num} failed ({exc}); retrying without base64")
+                    continue
+                if attempt == 2:
+                    raise
+                wait = 2 ** attempt
+                print(f"[EMB][retry] batch {batch_num} failed ({exc}); retrying in {wait}s")
+                time.sleep(wait)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [emb for chunk in pool.map(_embed_batch, starts) for emb in chunk]
+
+
+def embed_with_cache(
+    client: OpenAI,
+    texts: List[str],
+    model: str,
+    *,
+    batch_size: int = 96,
+    concurrency: int = 8,
+) -> List[np.ndarray]:
+    """
+    Embed `texts`, short-circuiting through the on-disk content cache.
+
+    Every text is looked up by its content key; only misses are sent to
+    Nebius (via _embed_texts), and fresh vectors are persisted before
+    returning. Output order matches input order. Vectors are cached at
+    full model dimensionality — truncation happens later at matrix build,
+    so changing EMBED_DIM_TRUNCATE never invalidates the cache.
+    """
+    conn = sqlite3.connect(EMBED_CACHE_PATH)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        keys = [_embed_cache_key(model, t) for t in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        positions: Dict[bytes, List[int]] = {}
+        for i, k in enumerate(keys):
+            positions.setdefault(k, []).append(i)
+
+        distinct = list(positions)
+        for start in range(0, len(distinct), 500):  # stay under sqlite's bind-parameter limit
+            chunk = distinct[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({marks})", chunk
+            )
+            for k, blob in rows:
+                vec = np.frombuffer(blob, dtype=np.float32)
+                for i in positions[k]:
+                    vectors[i] = vec
+
+        miss_idx = [i for i, v in enumerate(vectors) if v is None]
+        print(f"[EMB CACHE] hits={len(texts) - len(miss_idx)} misses={len(miss_idx)}")
+        if miss_idx:
+            fresh = _embed_texts(
+                client,
+                [texts[i] for i in miss_idx],
+                model,
+                batch_size=batch_size,
+                concurrency=concurrency,
+            )
+            inserts = []
+            for i, vec in zip(miss_idx, fresh):
+                vectors[i] = vec
+                inserts.append((keys[i], np.asarray(vec, dtype=np.float32).tobytes()))
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)", inserts
+            )
+            conn.commit()
+        return vectors
+    finally:
+        conn.close()
+
+
+# /index/batch embeds and adds vectors to FAISS in windows of this many
+# chunks instead of materializing every embedding at once: peak RAM for the
+# vector stage is O(window x dim) rather than O(total_chunks x dim) (at 4096
+# dims float32 that is ~64 MB per window vs. hundreds of MB for a big batch).
+EMBED_STREAM_WINDOW = 4096
+
+# Qwen3-Embedding-8B is Matryoshka-trained: leading prefixes of its 4096-dim
+# vectors are themselves valid embeddings. Truncating to 1024 dims cuts index
+# size, RAM and distance-compute FLOPs 4x for a small recall cost. Set to 0
+# to keep full dimensionality. Must match between indexing and query time
+# (the FAISS dim check enforces this).
+EMBED_DIM_TRUNCATE = 1024
+
+
+def _truncate_dims(arr: np.ndarray) -> np.ndarray:
+    """Matryoshka-truncate embedding rows; callers re-normalize afterwards."""
+    if EMBED_DIM_TRUNCATE and arr.shape[-1] > EMBED_DIM_TRUNCATE:
+        arr = np.ascontiguousarray(arr[..., :EMBED_DIM_TRUNCATE])
+    return arr
+
+
+# Bodies smaller than this are sent uncompressed: the gzip header/dictionary
+# overhead and the extra CPU beat any bandwidth saving on tiny payloads.
+GZIP_MIN_BYTES = 2048
+
+
+def _gzip_body(body: bytes, headers: Dict[str, str]) -> tuple:
+    """
+    Gzip a pre-serialized request body when it is large enough to pay off.
+    Returns (body, headers); headers gain Content-Encoding: gzip only when
+    compression was applied. compresslevel=1 favors CPU over ratio — these
+    are latency-sensitive API calls, not archives.
+    """
+    if len(body) < GZIP_MIN_BYTES:
+        return body, headers
+    return gzip.compress(body, compresslevel=1), {**headers, "Content-Encoding": "gzip"}
+
+
+# Post-retrieval LLM extractions are independent per chunk, so they fan out
+# in a bounded pool instead of one serial (fresh-TLS) call per chunk:
+# wall time drops from K * RTT to ~ceil(K / EXTRACT_CONCURRENCY) * RTT while
+# the bound keeps us under Nebius rate limits.
+EXTRACT_CONCURRENCY = 8
+
+
+def _extract_one(neb_client, neb_url, neb_headers, extraction_schema,
+                 system_prompt, user_content, hit, rank, *, max_tokens=600):
+    """
+    One schema-enforced chunk extraction via Chat Completions. Never raises:
+    failures come back as {"_error": ...} records so one bad chunk cannot
+    sink the batch (same contract as the serial loops this replaces).
+    """
+    payload = {
+        "model": NEBIUS_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
+        ],
+        "temperature": 0.1,
+        "max_tokens": max_tokens,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": extraction_schema
+        }
+    }
+    try:
+        body, hdrs = _gzip_body(orjson.dumps(payload), neb_headers)
+        resp = neb_client.post(neb_url, content=body, headers=hdrs)
+        data = orjson.loads(resp.content)
+        content = ""
+        if isinstance(data, dict) and "choices" in data and data["choices"]:
+            content = data["choices"][0]["message"]["content"] or ""
+        extracted_obj = {}
+        if content:
+            try:
+                extracted_obj = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                # If schema mode was not obeyed due to model drift, keep raw content for debugging.
+                extracted_obj = {"_raw": content}
+        extracted_obj["_provenance"] = {
+            "pmcid": hit.get("pmcid", ""),
+            "doi": hit.get("doi", ""),
+            "title": hit.get("title", ""),
+            "year": hit.get("year", 0),
+            "journal": hit.get("journal", ""),
+            "source_url": hit.get("source_url", ""),
+            "rank": hit.get("rank", rank),
+            "score": hit.get("score", None),
+            "node_id": hit.get("id"),
+        }
+        return extracted_obj
+    except Exception as e:
+        print(f"[EXTRACT][error] {e}")
+        return {
+            "_error": str(e),
+            "_provenance": {
+                "pmcid": hit.get("pmcid", ""),
+                "title": hit.get("title", ""),
+                "rank": hit.get("rank", rank),
+                "node_id": hit.get("id"),
+            }
+        }
+
+
+def _extract_concurrently(tasks, extraction_schema, system_prompt,
+                          neb_url, neb_headers, *, max_tokens=600):
+    """
+    Run (hit, user_content, rank) extraction tasks with bounded fan-out.
+    One keep-alive client serves all calls; pool.map preserves task order.
+    """
+    if not tasks:
+        return []
+    with httpx.Client(
+        timeout=90,
+        limits=httpx.Limits(max_connections=EXTRACT_CONCURRENCY),
+    ) as neb_client, ThreadPoolExecutor(max_workers=EXTRACT_CONCURRENCY) as pool:
+        return list(pool.map(
+            lambda t: _extract_one(
+                neb_client, neb_url, neb_headers, extraction_schema,
+                system_prompt, t[1], t[0], t[2], max_tokens=max_tokens,
+            ),
+            tasks,
+        ))
+
+
+def clean_metadata_for_chroma(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert harvest metadata to Chroma-compatible primitives (no None values).
+
+    The key set is fixed by /harvest, so this builds the dict directly instead
+    of walking an isinstance ladder per key; protein_hits (the only non-scalar
+    field) serializes via orjson.
+    """
+    m = meta or {}
+    return {
+        "pmcid": m.get("pmcid") or "",
+        "doi": m.get("doi") or "",
+        "title": m.get("title") or "",
+        "year": m.get("year") or 0,
+        "journal": m.get("journal") or "",
+        "protein_hits": orjson.dumps(m.get("protein_hits") or []).decode(),
+        "source_url": m.get("source_url") or "",
+    }
+
+
+# Columnar sidecar for meta.jsonl: one zstd Parquet part per batch. The JSONL
+# stays the row-aligned source of truth for FAISS lookups; the Parquet parts
+# exist for cheap analytic scans (e.g. "all titles/years") that would
+# otherwise re-parse every JSONL line including the big text column.
+_META_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("text", pa.large_string()),
+    ("pmcid", pa.string()),
+    ("doi", pa.string()),
+    ("title", pa.string()),
+    ("year", pa.int32()),
+    ("journal", pa.string()),
+    ("protein_hits", pa.large_string()),
+    ("source_url", pa.string()),
+])
+
+
+def _write_meta_parquet(node_ids, node_texts, node_metas, start_row: int) -> None:
+    """
+    Append this batch's metadata as a Parquet part file (best-effort).
+
+    Part files are named by the FAISS row the batch starts at, so
+    ``pq.read_table(parts_dir)`` over the sorted directory reproduces row
+    order without touching meta.jsonl.
+    """
+    parts_dir = os.path.join(FAISS_DIR, "meta_parquet")
+    os.makedirs(parts_dir, exist_ok=True)
+    rows = [
+        {"id": _id, "text": _txt, **_meta}
+        for _id, _txt, _meta in zip(node_ids, node_texts, node_metas)
+    ]
+    table = pa.Table.from_pylist(rows, schema=_META_SCHEMA)
+    pq.write_table(
+        table,
+        os.path.join(parts_dir, f"meta-{start_row:012d}.parquet"),
+        compression="zstd",
+    )
+
+
+@lru_cache(maxsize=1)
+def _list_papers(dir_mtime: float) -> tuple:
+    """
+    Sorted paths of all '*.json' files under PAPERS_DIR.
+
+    Cached on the directory mtime: batch calls paginating the same corpus
+    (offset=0, 200, 400, ...) reuse one listing instead of re-running
+    os.listdir + sort per request; a harvest that adds/removes files bumps
+    the mtime and invalidates the cache. os.scandir yields entries with the
+    name cached, so no per-file stat calls are made.
+    """
+    return tuple(sorted(
+        e.path for e in os.scandir(PAPERS_DIR) if e.name.endswith(".json")
+    ))
+
+
+# Paper JSONs carry multi-MB plain_text fields; the default 8 KB file buffer
+# turns each load into hundreds of read() syscalls. A 1 MB buffer reads most
+# files in a handful, and a size cap skips pathological files before they
+# are parsed (a harvested paper should never be this big).
+PAPER_MAX_BYTES = 50 * 1024 * 1024
+
+
+def _read_paper_json(path: str) -> Dict[str, Any]:
+    """Load one harvested paper JSON (big read buffer, size-capped)."""
+    size = os.path.getsize(path)
+    if size > PAPER_MAX_BYTES:
+        raise ValueError(f"paper file is {size} bytes (> {PAPER_MAX_BYTES}); skipping")
+    with open(path, "rb", buffering=1 << 20) as f:
+        return orjson.loads(f.read())
+
+
 def load_pmcid_to_text(papers_dir: str = PAPERS_DIR) -> Dict[str, str]:
     """
     Build a mapping {pmcid -> plain_text} from all JSON files under 'papers/'.
@@ -62,8 +989,7 @@ def load_pmcid_to_text(papers_dir: str = PAPERS_DIR) -> Dict[str, str]:
                 continue
             path = os.path.join(papers_dir, fn)
             try:
-                with open(path, "r", encoding="utf-8") as f:
-                    paper = json.load(f)
+                paper = _read_paper_json(path)
                 pmcid = (paper.get("pmcid") or "").strip()
                 text = (paper.get("plain_text") or "").strip()
                 if pmcid and text and pmcid not in mapping:
@@ -77,75 +1003,76 @@ def load_pmcid_to_text(papers_dir: str = PAPERS_DIR) -> Dict[str, str]:
 
 @app.get("/nebius-embed-hello")
 def nebius_embed_hello():
-    from openai import OpenAI
-    client = OpenAI(api_key=settings.nebius_api_key, base_url=NEBIUS_BASE_URL)
+    client = _nebius_client()
     r = client.embeddings.create(model=NEBIUS_EMBED_MODEL, input=["hello", "protein longevity"])
     print("[EMBED HELLO] dims:", len(r.data[0].embedding), len(r.data[1].embedding))
     return {"status": "ok"}
 
 
 
+# The hello prompt never changes, so its request body is serialized exactly
+# once at import time; each call hands httpx the ready bytes (json= would
+# re-run a dict walk + json.dumps + utf-8 encode per request). The auth
+# headers are likewise constant per process.
+# Payload follows Nebius' OpenAI-compatible schema (messages[], model, etc.).
+# Reference: Nebius Quickstart /v1/chat/completions. :contentReference[oaicite:1]{index=1}
+_NEBIUS_HELLO_PAYLOAD = orjson.dumps({
+    "model": NEBIUS_MODEL,
+    "messages": [
+        {"role": "system", "content": "You are a concise scientific assistant."},
+        {
+            "role": "user",
+            "content": (
+                "Return a JSON object with fields 'name', 'url', 'notes' for 3 public databases "
+                "that provide free APIs for human proteins that are related to longevity. No markdown, JSON only."
+            ),
+        },
+    ],
+    "max_tokens": 500,
+    "temperature": 0.2,
+    "response_format": {"type": "json_object"},
+})
+_NEBIUS_HEADERS = {
+    "Authorization": f"Bearer {settings.nebius_api_key}",
+    "Content-Type": "application/json",
+}
+
+
 @app.get("/nebius-hello")
-def nebius_hello():
+async def nebius_hello():
     """
     Tiny test against Nebius Chat Completions.
     - Reads ONLY the API key from .env (no other secrets).
-    - Sends a very short prompt.
+    - Sends a very short prompt (pre-serialized at import time).
     - Prints raw response to the server terminal for inspection.
     - Returns only {"status": "ok"} to the client (no extra payload).
     """
-    api_key = settings.nebius_api_key
-
     url = f"{NEBIUS_BASE_URL}chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-
-    # Short, harmless test prompt (no internet access assumed).
-    prompt = (
-        "Return a JSON object with fields 'name', 'url', 'notes' for 3 public databases "
-        "that provide free APIs for human proteins that are related to longevity. No markdown, JSON only."
-    )
-
-    # Payload follows Nebius' OpenAI-compatible schema (messages[], model, etc.).
-    # Reference: Nebius Quickstart /v1/chat/completions. :contentReference[oaicite:1]{index=1}
-    payload = {
-        "model": NEBIUS_MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a concise scientific assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        
-        "max_tokens": 500,
-        "temperature": 0.2,
-        "response_format": {"type": "json_object"}
-    }
 
-    print("[Nebius HELLO] POST", url, "model=", NEBIUS_MODEL)
-    with httpx.Client(timeout=60) as client:
-        resp = client.post(url, json=payload, headers=headers)
+    log.info("[Nebius HELLO] POST %s model=%s", url, NEBIUS_MODEL)
+    resp = await app.state.http.post(url, content=_NEBIUS_HELLO_PAYLOAD, headers=_NEBIUS_HEADERS)
 
-    print("[Nebius HELLO] HTTP:", resp.status_code)
+    log.info("[Nebius HELLO] HTTP: %s", resp.status_code)
     try:
-        data = resp.json()
-        print("[Nebius HELLO] JSON:", data)  # full raw JSON from Nebius
-        
+        # orjson decodes the raw bytes, skipping the stdlib-json path of resp.json()
+        data = orjson.loads(resp.content)
+        log.debug("[Nebius HELLO] JSON: %s", data)  # full raw JSON from Nebius
+
         # Extract and parse the JSON response from the model
         if "choices" in data and len(data["choices"]) > 0:
             msg = data["choices"][0]["message"]["content"]
-            print("[Nebius HELLO] Model response:", msg)
-            
+            log.debug("[Nebius HELLO] Model response: %s", msg)
+
             # Try to parse the JSON response from the model
-            import json
             try:
-                parsed_response = json.loads(msg)
-                print("[Nebius HELLO] Parsed JSON:", parsed_response)
-            except json.JSONDecodeError as e:
-                print("[Nebius HELLO] JSON parse error:", e)
-                
+                parsed_response = orjson.loads(msg)
+                log.debug("[Nebius HELLO] Parsed JSON: %s", parsed_response)
+            except orjson.JSONDecodeError as e:
+                log.warning("[Nebius HELLO] JSON parse error: %s", e)
+
     except Exception:
-        print("[Nebius HELLO] TEXT:", resp.text[:1000])
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("[Nebius HELLO] TEXT: %s", resp.text[:1000])
 
     
     return {"status": "ok"}
@@ -162,51 +1089,85 @@ def health():
 EPMC_SEARCH_URL = "https://www.ebi.ac.uk/europepmc/webservices/rest/search"
 EPMC_FULLTEXT_BASE = "https://www.ebi.ac.uk/europepmc/webservices/rest"
 
+# Constant part of the search query string, built once (only cursorMark
+# varies between pages):
+# - OPEN_ACCESS:Y restricts to OA
+# - synonym=Y lets Europe PMC expand common gene synonyms
+_EPMC_PROTEIN = "SIRT6"  # <-- change this to the protein you want to test
+_EPMC_SEARCH_PARAMS = {
+    "query": f'(TEXT:"{_EPMC_PROTEIN}") AND OPEN_ACCESS:Y',
+    "resultType": "lite",     # IDs + basic fields only; ~5x smaller than 'core' when we don't need abstracts
+    "format": "json",         # response format: could also be 'xml', but JSON is easiest for Python
+    "pageSize": "25",         # number of results per page (max 1000)
+    "sort": "CITED desc",     # sort by number of citations, descending (most cited papers first)
+    "synonym": "Y",           # expand gene/protein synonyms automatically (Europe PMC has a built-in synonym dictionary)
+}
+
 @app.get("/europepmc-search")
-def europepmc_search():
+async def europepmc_search(pages: int = 3):
     """
     Smoke-test Europe PMC SEARCH for a single protein, Open Access only.
-    - Hard-coded 'PROTEIN' for now (no query params).
+    - Hard-coded 'PROTEIN' for now; `pages` caps how many cursor pages to pull.
+    - Streams pages via cursorMark deep paging; the next page's GET is
+      launched as soon as the current page's cursor is parsed, so network
+      RTT to EBI overlaps with our CPU-side processing.
     - Prints a compact table to server terminal so you can inspect results.
     - Returns only {"status":"ok"} to the client.
     """
-    PROTEIN = "SIRT6"  # <-- change this to the protein you want to test
-
-    # Build a conservative, high-recall query:
-    # - OPEN_ACCESS:Y restricts to OA
-    # - synonym=Y lets Europe PMC expand common gene synonyms
-    params = {
-        "query": f'(TEXT:"{PROTEIN}") AND OPEN_ACCESS:Y',
-        "resultType": "core",     # return the standard metadata fields (title, abstract, authors, IDs, OA flag, etc.)
-        "format": "json",         # response format: could also be 'xml', but JSON is easiest for Python
-        "pageSize": "25",         # number of results per page (max 1000)
-        "sort": "CITED desc",     # sort by number of citations, descending (most cited papers first)
-        "synonym": "Y",           # expand gene/protein synonyms automatically (Europe PMC has a built-in synonym dictionary)
-    }
+    # Constant query parts live in _EPMC_SEARCH_PARAMS (module level, built
+    # once); only the cursorMark changes per page.
+    params = _EPMC_SEARCH_PARAMS
 
-    print(f"[EPMC SEARCH] GET {EPMC_SEARCH_URL} q={params['query']}")
-    with httpx.Client(timeout=60) as client:
-        r = client.get(EPMC_SEARCH_URL, params=params)
-    print("[EPMC SEARCH] HTTP:", r.status_code)
+    log.info("[EPMC SEARCH] GET %s q=%s", EPMC_SEARCH_URL, params["query"])
 
-    try:
-        data = r.json()
-    except Exception:
-        print("[EPMC SEARCH] Non-JSON response head:", r.text[:500])
-        return {"status": "ok"}
+    cursor = "*"
+    total = 0
+    next_task = asyncio.create_task(
+        app.state.http.get(EPMC_SEARCH_URL, params={**params, "cursorMark": cursor})
+    )
+    for page in range(1, max(1, int(pages)) + 1):
+        r = await next_task
+        next_task = None
+        log.info("[EPMC SEARCH] page=%d HTTP: %s", page, r.status_code)
+
+        try:
+            data = orjson.loads(r.content)
+        except Exception:
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[EPMC SEARCH] Non-JSON response head: %s", r.text[:500])
+            break
+
+        results = (data.get("resultList") or {}).get("result") or []
+        next_cursor = data.get("nextCursorMark")
+
+        # Kick off the next page fetch *before* processing this one, so the
+        # ~200ms EBI round-trip runs while we chew on the current results.
+        if results and next_cursor and next_cursor != cursor and page < pages:
+            cursor = next_cursor
+            next_task = asyncio.create_task(
+                app.state.http.get(EPMC_SEARCH_URL, params={**params, "cursorMark": cursor})
+            )
 
-    results = (data.get("resultList") or {}).get("result") or []
-    print(f"[EPMC SEARCH] hits={len(results)}  (showing up to 10)")
-    for i, rec in enumerate(results[:10], start=1):
-        title = rec.get("title") or ""
-        year = rec.get("pubYear")
-        doi = rec.get("doi")
-        pmcid = rec.get("pmcid")
-        pmid = rec.get("pmid")
-        is_oa = rec.get("isOpenAccess")
-        journal = rec.get("journalTitle")
-        print(f"  {i:02d}. {year} | OA={is_oa} | DOI={doi} | PMCID={pmcid} | PMID={pmid} | {journal}")
-        print(f"      {title}")
+        total += len(results)
+        log.info("[EPMC SEARCH] page=%d hits=%d  (showing up to 10)", page, len(results))
+        if log.isEnabledFor(logging.DEBUG):
+            for i, rec in enumerate(results[:10], start=1):
+                title = rec.get("title") or ""
+                year = rec.get("pubYear")
+                doi = rec.get("doi")
+                pmcid = rec.get("pmcid")
+                pmid = rec.get("pmid")
+                is_oa = rec.get("isOpenAccess")
+                journal = rec.get("journalTitle")
+                log.debug(
+                    "  %02d. %s | OA=%s | DOI=%s | PMCID=%s | PMID=%s | %s\n      %s",
+                    i, year, is_oa, doi, pmcid, pmid, journal, title,
+                )
+
+        if next_task is None:
+            break
+
+    log.info("[EPMC SEARCH] total hits across pages: %d", total)
 
     # Tip for your next manual step:
     # - Pick one PMCID from the list above and paste it into the fulltext endpoint below.
@@ -265,7 +1226,7 @@ def chroma_test_basic():
         raise HTTPException(status_code=500, detail=f"chroma-test-basic failed: {str(e)}")
 
 @app.get("/europe-pmc-fulltext-xml")
-def europe_pmc_fulltext_xml():
+async def europe_pmc_fulltext_xml():
     """
     Smoke-test Europe PMC FULLTEXT (XML) download for a single OA article.
     - Hard-coded 'EPMC_ID' (e.g., 'PMC1234567') for now.
@@ -274,26 +1235,41 @@ def europe_pmc_fulltext_xml():
     """
     EPMC_ID = "PMC3439153"  # <-- replace with a real PMCID from the search above, e.g. 'PMC1234567'
     if EPMC_ID == "PMC0000000":
-        print("[EPMC FULLTEXT] Please set EPMC_ID to a real PMCID (e.g., 'PMC1234567').")
+        log.info("[EPMC FULLTEXT] Please set EPMC_ID to a real PMCID (e.g., 'PMC1234567').")
         return {"status": "ok"}
 
     url = f"{EPMC_FULLTEXT_BASE}/{EPMC_ID}/fullTextXML"
-    print(f"[EPMC FULLTEXT] GET {url}")
-    with httpx.Client(timeout=60) as client:
-        r = client.get(url)
-    print("[EPMC FULLTEXT] HTTP:", r.status_code)
-
-    if r.status_code != 200:
-        print("[EPMC FULLTEXT] Response head:", r.text[:500])
-        return {"status": "ok"}
+    log.info("[EPMC FULLTEXT] GET %s", url)
+
+    # Stream the (multi-MB) JATS body through a pull parser: sections are
+    # extracted and freed as they complete, so memory stays O(chunk) instead
+    # of holding (and re-encoding) the whole XML string.
+    sec_texts: List[str] = []
+    parser = etree.XMLPullParser(events=("end",), tag="{*}sec")
+    async with app.state.http.stream("GET", url) as r:
+        log.info("[EPMC FULLTEXT] HTTP: %s", r.status_code)
+        if r.status_code != 200:
+            head = await r.aread()
+            log.info("[EPMC FULLTEXT] Response head: %s", head[:500].decode("utf-8", "ignore"))
+            return {"status": "ok"}
+
+        async for chunk in r.aiter_bytes():
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                # Keep body <sec> text; <ref-list> never matches and is dropped.
+                sec_texts.append("".join(elem.itertext()))
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+        log.info("[EPMC FULLTEXT] bytes downloaded: %s", r.num_bytes_downloaded)
+
+    log.info("[EPMC FULLTEXT] sections parsed: %d", len(sec_texts))
+    # Log only lengths at INFO; copying section text out of a multi-MB
+    # document is DEBUG-only.
+    if sec_texts and log.isEnabledFor(logging.DEBUG):
+        log.debug("[EPMC FULLTEXT] first section snippet (500 chars): %s", sec_texts[0][:500])
 
-    xml_text = r.text or ""
-    # Lightweight visibility: show total size + snippet so you can see structure (JATS tags).
-    print(f"[EPMC FULLTEXT] XML bytes: {len(xml_text.encode('utf-8'))}")
-    print("[EPMC FULLTEXT] XML snippet (first 1000 chars):")
-    print(xml_text[:10000])
-
-    # (Later) You'll parse JATS here: drop <ref-list>, keep body <sec> text, create clean chunks.
     return {"status": "ok"}
 
 
@@ -317,9 +1293,8 @@ def index_batch(limit: int = 200, offset: int = 0):
         print(f"[INDEX] Folder '{PAPERS_DIR}' does not exist. Create it and drop JSON files inside.")
         return {"status": "ok"}
 
-    all_files = [os.path.join(PAPERS_DIR, fn) for fn in os.listdir(PAPERS_DIR) if fn.endswith(".json")]
-    all_files.sort()
-    files = all_files[offset: offset + limit]
+    all_files = _list_papers(os.stat(PAPERS_DIR).st_mtime)
+    files = list(all_files[offset: offset + limit])
 
     print(f"[INDEX] files_seen_total={len(all_files)} | batch_offset={offset} | batch_limit={limit} | batch_files={len(files)}")
     if not files:
@@ -327,12 +1302,22 @@ def index_batch(limit: int = 200, offset: int = 0):
         return {"status": "ok"}
 
     # --- Build Documents (we only require 'plain_text'; everything else is metadata and may be null) ---
+    # Overlap the per-file read+parse syscalls in a small pool; pool.map
+    # returns results in input order so the slice stays deterministic.
+    with ThreadPoolExecutor(max_workers=16) as io_pool:
+        def _safe_read(path: str):
+            try:
+                return _read_paper_json(path)
+            except Exception as e:
+                return e
+        papers = list(io_pool.map(_safe_read, files))
+
     docs: List[Document] = []
     skipped_empty = 0
-    for path in files:
+    for path, paper in zip(files, papers):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                paper: Dict[str, Any] = json.load(f)
+            if isinstance(paper, Exception):
+                raise paper
             text = (paper.get("plain_text") or "").strip()
             if not text:
                 skipped_empty += 1
@@ -363,115 +1348,99 @@ def index_batch(limit: int = 200, offset: int = 0):
         print("[INDEX] No usable documents in this batch (all had empty 'plain_text' or failed to load).")
         return {"status": "ok"}
 
-    # Verbose dump of Documents for full transparency
-    # print("[INDEX][DEBUG] Dumping Documents...")
-    # for d in docs:
-    #     try:
-    #         print(f"--- Document doc_id={d.doc_id}")
-    #         print(f"metadata={json.dumps(d.metadata, ensure_ascii=False)}")
-    #         print("text:")
-    #         print(d.text)
-    #     except Exception as e:
-    #         print(f"[INDEX][DEBUG][doc dump error] {e}")
+    # Doc-level skip: anything indexed by a previous batch is dropped before
+    # splitting (see INDEXED_IDS_PATH).
+    _seen_ids = _load_indexed_ids()
+    if _seen_ids:
+        _before = len(docs)
+        docs = [d for d in docs if d.doc_id not in _seen_ids]
+        if len(docs) < _before:
+            print(f"[INDEX] docs_skipped_already_indexed={_before - len(docs)}")
+        if not docs:
+            print(f"[INDEX] All documents in this batch already indexed.")
+            return {"status": "ok"}
+
+    # Verbose dump of Documents: only assembled when DEBUG is actually on, so
+    # the hot path never pays for formatting (or writing) megabytes of text.
+    if log.isEnabledFor(logging.DEBUG):
+        for d in docs:
+            log.debug("--- Document doc_id=%s metadata=%s\n%s", d.doc_id, d.metadata, d.text)
 
     # --- Chunking (no embeddings yet) ---
     # Explanation:
     # - chunk_size ~800 tokens is a common sweet spot for scientific text.
     # - chunk_overlap retains context and helps retrieval across chunk boundaries.
-    splitter = SentenceSplitter(chunk_size=800, chunk_overlap=120)
-    nodes = splitter.get_nodes_from_documents(docs)
-    print(f"[INDEX] chunks_created={len(nodes)}")
+    # _split_documents also assigns the deterministic "{doc_id}::chunk-{k}"
+    # ids the upsert and IDMap2 paths rely on.
+    nodes = _split_documents(docs)
 
-    # Verbose dump of Nodes (post-splitting)
-    # print("[INDEX][DEBUG] Dumping Nodes...")
-    # for i, n in enumerate(nodes):
-    #     try:
-    #         print(f"--- Node {i} id={n.id_} ref_doc_id={n.ref_doc_id}")
-    #         print(f"metadata={json.dumps(n.metadata or {}, ensure_ascii=False)}")
-    #         content = n.get_content(metadata_mode="none")
-    #         print("content:")
-    #         print(content)
-    #     except Exception as e:
-    #         print(f"[INDEX][DEBUG][node dump error] {e}")
+    print(f"[INDEX] chunks_created={len(nodes)}")
 
+    # Verbose dump of Nodes (post-splitting), same DEBUG-only gate as above.
+    if log.isEnabledFor(logging.DEBUG):
+        for i, n in enumerate(nodes):
+            log.debug(
+                "--- Node %d id=%s ref_doc_id=%s metadata=%s\n%s",
+                i, n.id_, n.ref_doc_id, n.metadata, n.get_content(metadata_mode="none"),
+            )
 
     if not nodes:
         print("[INDEX] No chunks created (unexpected if plain_text had content).")
         return {"status": "ok"}
 
     # --- Embeddings directly via Nebius (OpenAI-compatible) and upsert to Chroma ---
-    print("[INDEX][DEBUG] Creating OpenAI client for Nebius...")
-    client = OpenAI(api_key=settings.nebius_api_key, base_url=NEBIUS_BASE_URL)
+    log.debug("[INDEX] Using shared OpenAI client for Nebius...")
+    client = _nebius_client()
 
     # Prepare texts for embedding (one embedding per node)
-    print("[INDEX][DEBUG] Preparing node IDs and texts...")
     node_ids = [n.id_ for n in nodes]
     node_texts = [n.get_content(metadata_mode="none") for n in nodes]   # extract text content only
-    print(f"[INDEX][DEBUG] Prepared {len(node_ids)} node IDs and {len(node_texts)} texts")
+    log.debug("[INDEX] Prepared %d node IDs and %d texts", len(node_ids), len(node_texts))
     
-    # Clean metadata for Chroma (convert lists to JSON strings, keep only simple types)
-    def clean_metadata_for_chroma(meta: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert metadata to Chroma-compatible format (str, int, float, bool only - NO None!)."""
-        cleaned = {}
-        for key, value in (meta or {}).items():
-            if value is None:
-                # Use type-appropriate defaults for known fields to maintain consistent types
-                # Based on actual JSON structure: pmcid, doi, title, year, journal, protein_hits, source_url
-                if key == "year":
-                    cleaned[key] = 0  # year is numeric field, default to 0
-                else:
-                    cleaned[key] = ""  # all other fields (pmcid, doi, title, journal, source_url, protein_hits) get empty string
-            elif isinstance(value, (str, int, float, bool)):
-                cleaned[key] = value  # keep simple types as-is
-            elif isinstance(value, list):
-                cleaned[key] = json.dumps(value)  # convert lists to JSON string (e.g., protein_hits)
-            elif isinstance(value, dict):
-                cleaned[key] = json.dumps(value)  # convert dicts to JSON string
-            else:
-                cleaned[key] = str(value)  # fallback: convert to string
-        return cleaned
-    
-    print("[INDEX][DEBUG] Cleaning metadata for Chroma...")
     node_metas = [clean_metadata_for_chroma(n.metadata) for n in nodes]  # extract and clean metadata
-    print(f"[INDEX][DEBUG] Cleaned {len(node_metas)} metadata entries")
-
-    # Request embeddings in a single batch from Nebius
-    try:
-        print(f"[INDEX] Embedding with model='{NEBIUS_EMBED_MODEL}' at base_url='{NEBIUS_BASE_URL}' ...")
-        print(f"[INDEX][DEBUG] Sending {len(node_texts)} texts to Nebius for embedding...")
-        # ALT (Single-Batch, vorher):
-        # emb_resp = client.embeddings.create(model=NEBIUS_EMBED_MODEL, input=node_texts)
-        # print("[INDEX][DEBUG] Received response from Nebius, extracting embeddings...")
-        # embeddings = [d.embedding for d in emb_resp.data]  # extract embedding vectors
-        # print(f"[INDEX][DEBUG] Extracted {len(embeddings)} embeddings")
-
-        # --- simples Batching für Embeddings (keine Retries, kein Backoff) ---
-        BATCH_SIZE = 96  # z.B. 64–128; 96 ist ein guter Start
-        embeddings = []
-        total_batches = (len(node_texts) + BATCH_SIZE - 1) // BATCH_SIZE
-        for start in range(0, len(node_texts), BATCH_SIZE):
-            batch = node_texts[start:start + BATCH_SIZE]
-            batch_num = start // BATCH_SIZE + 1
-            if batch_num == 1 or batch_num % 10 == 0 or batch_num == total_batches:
-                print(f"[INDEX][EMB] batch {batch_num}/{total_batches} (+{len(batch)} texts)")
-            resp = client.embeddings.create(model=NEBIUS_EMBED_MODEL, input=batch)
-            # Reihenfolge bleibt wie Input; wir hängen nur an
-            embeddings.extend([item.embedding for item in resp.data])
-
-        print(f"[INDEX][DEBUG] Total embeddings: {len(embeddings)}")
-    except Exception as e:
-        print(f"[INDEX][embed error] {e}")
-        raise HTTPException(status_code=500, detail="Nebius embedding request failed")
-
-    # Sanity check: ensure we got one embedding per node
-    if len(embeddings) != len(node_ids):
-        print(f"[INDEX][embed mismatch] ids={len(node_ids)} vs embeds={len(embeddings)}")
-        raise HTTPException(status_code=500, detail="Embedding count mismatch")
-
-    # Debug: Check embedding dimensions
-    if embeddings:
-        emb_dim = len(embeddings[0])
-        print(f"[INDEX][DEBUG] Embedding dimensions: {emb_dim} (first vector)")
+    log.debug("[INDEX] Cleaned %d metadata entries for Chroma", len(node_metas))
+
+    # --- Upsert-style skip of unchanged chunks (content hash) ---
+    # FAISS has no native upsert, so each meta record carries a blake2b hash
+    # of its chunk text. Chunks whose (id, hash) pair is already present in
+    # meta.jsonl are dropped before embedding: re-running a batch over an
+    # unchanged corpus costs zero Nebius embedding calls. New or changed
+    # chunks are appended as before.
+    node_hashes = [
+        hashlib.blake2b(t.encode("utf-8"), digest_size=16).hexdigest() for t in node_texts
+    ]
+    for meta, h in zip(node_metas, node_hashes):
+        meta["content_hash"] = h
+
+    existing_hashes: Dict[str, str] = {}
+    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
+    if os.path.isfile(meta_path):
+        with open(meta_path, "rb") as f:
+            for line in f:
+                rec = orjson.loads(line)
+                existing_hashes[rec.get("id")] = (rec.get("meta") or {}).get("content_hash", "")
+    # Rows queued for the next checkpoint are already in the live index but
+    # not yet in meta.jsonl; fold their hashes in so a re-run before the
+    # flush still skips them.
+    with _INDEX_LOCK:
+        for _p_ids, _p_texts, _p_metas, _p_docs, _p_row in _PENDING_RECORDS:
+            for _id, _m in zip(_p_ids, _p_metas):
+                existing_hashes[_id] = (_m or {}).get("content_hash", "")
+
+    keep = [
+        i for i, (_id, h) in enumerate(zip(node_ids, node_hashes))
+        if existing_hashes.get(_id) != h
+    ]
+    skipped_unchanged = len(node_ids) - len(keep)
+    if skipped_unchanged:
+        print(f"[INDEX] chunks_skipped_unchanged={skipped_unchanged}")
+        node_ids = [node_ids[i] for i in keep]
+        node_texts = [node_texts[i] for i in keep]
+        node_metas = [node_metas[i] for i in keep]
+        node_hashes = [node_hashes[i] for i in keep]
+    if not node_ids:
+        print("[INDEX] All chunks unchanged; nothing to embed for this batch.")
+        return {"status": "ok"}
 
     # === FAISS: Minimalpersistenz (ein Index + eine JSONL mit Metadaten), APPEND-ONLY ===
     # Ensure target directory exists (no deletion between batches)
@@ -482,16 +1451,6 @@ def index_batch(limit: int = 200, offset: int = 0):
         print(f"[INDEX][FAISS dir error] {e}")
         raise HTTPException(status_code=500, detail="Failed to create FAISS directory")
 
-    # Convert embeddings to a contiguous float32 matrix that FAISS expects: shape [num_vectors, embedding_dim]
-    # FAISS operates on float32 arrays; this makes dtype and memory layout compatible and fast.
-    X = np.array(embeddings, dtype="float32")
-    if X.ndim != 2 or X.shape[0] == 0:
-        raise HTTPException(status_code=500, detail="No embeddings to index")
-    # L2-normalize each vector so that inner product (IP) behaves like cosine similarity (IP of unit vectors = cosine)
-    faiss.normalize_L2(X)
-
-    # Embedding dimensionality (number of features per vector). Must stay constant across all batches for the same index.
-    dim = int(X.shape[1])
     # Build file paths:
     # - faiss_path is the persisted index file; os.path.join safely constructs the path for the current OS.
     #   The file may or may not exist yet; existence is handled below.
@@ -499,61 +1458,161 @@ def index_batch(limit: int = 200, offset: int = 0):
     faiss_path = os.path.join(FAISS_DIR, "index.faiss")
     dim_path = os.path.join(FAISS_DIR, "dim.txt")
 
-    # If an index exists, load and validate dimension; else create new
-    # Load existing index (resume) if it exists and its dimension matches; otherwise create a fresh IndexFlatIP.
-    # IndexFlatIP uses inner product; combined with L2 normalization this yields cosine-like retrieval.
-    if os.path.isfile(faiss_path):
-        index = faiss.read_index(faiss_path)
-        if int(index.d) != dim:
-            raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: index has {int(index.d)}, new vectors have {dim}")
-        print(f"[INDEX][FAISS] Loaded existing index: {faiss_path} (ntotal={index.ntotal}, dim={int(index.d)})")
-    else:
-        index = faiss.IndexFlatIP(dim)
-        print(f"[INDEX][FAISS] Created new IndexFlatIP dim={dim}")
-
-    # Persist/verify dimension helper file
-    try:
-        if os.path.isfile(dim_path):
-            try:
-                # 'with' is a Python context manager: it opens the file and guarantees it will be closed automatically.
-                with open(dim_path, "r", encoding="utf-8") as g:
-                    prev_dim = int((g.read() or "").strip() or "0")
-                if prev_dim != dim:
-                    raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: stored dim.txt={prev_dim}, new vectors have {dim}")
-            except ValueError:
-                print("[INDEX][FAISS dim warn] dim.txt is not an integer; rewriting")
-                with open(dim_path, "w", encoding="utf-8") as g:  # context manager ensures the file is closed properly
-                    g.write(str(dim))
-        else:
-            with open(dim_path, "w", encoding="utf-8") as g:  # first-time write of the embedding dimension
-                g.write(str(dim))
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"[INDEX][FAISS dim write warn] {e}")
-
-    # Append new vectors
-    index.add(X)
-    faiss.write_index(index, faiss_path)
-    print(f"[INDEX][FAISS] Saved index: {faiss_path} (ntotal={index.ntotal})")
-
-    # Append metadata aligned with vector order: each new JSONL line corresponds to a newly added vector
-    # JSONL (JSON Lines) = one JSON object per line; ideal for append-only writes and easy streaming reads
-    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")  # target metadata file (append-only across batches)
+    # Streamed embed+add: instead of materializing every embedding for the
+    # whole batch and then building one giant matrix, walk the node lists in
+    # EMBED_STREAM_WINDOW slices — embed a window, copy it into a small
+    # matrix, add it to the index, drop it. Peak RAM for the vector stage is
+    # one window, and a crash mid-batch loses at most the current window's
+    # API spend (the embedding cache keeps the rest). The index itself is
+    # written to disk once, after the loop — write_index is the expensive
+    # full-file serialization.
+    print(f"[INDEX] Embedding with model='{NEBIUS_EMBED_MODEL}' at base_url='{NEBIUS_BASE_URL}' ...")
+    index = None
+    dim = 0
+    for _start in range(0, len(node_ids), EMBED_STREAM_WINDOW):
+        _w_ids = node_ids[_start:_start + EMBED_STREAM_WINDOW]
+        _w_hashes = node_hashes[_start:_start + EMBED_STREAM_WINDOW]
+        _w_texts = node_texts[_start:_start + EMBED_STREAM_WINDOW]
+        try:
+            log.debug("[INDEX] Sending window of %d texts to Nebius for embedding...", len(_w_texts))
+
+            # --- Within-batch dedup: embed each distinct chunk text once ---
+            # Papers repeat boilerplate (acknowledgments, funding, legends), so a
+            # batch often contains identical chunks. Keyed on the blake2b hashes
+            # computed above, only the first occurrence of each text is sent to
+            # Nebius; duplicates reuse its vector afterwards.
+            hash_slot: Dict[str, int] = {}
+            embed_texts: List[str] = []
+            for h, t in zip(_w_hashes, _w_texts):
+                if h not in hash_slot:
+                    hash_slot[h] = len(embed_texts)
+                    embed_texts.append(t)
+            if len(embed_texts) < len(_w_texts):
+                dedup_ratio = 1 - len(embed_texts) / len(_w_texts)
+                print(f"[INDEX][EMB] dedup: {len(_w_texts)} chunks -> {len(embed_texts)} unique ({dedup_ratio:.1%} saved)")
+
+            # --- Batching für Embeddings, mit Retries und bounded Fan-out ---
+            # embed_with_cache looks every unique text up in the on-disk cache
+            # first and sends only genuine misses through the bounded concurrent
+            # batch path (_embed_texts), so re-runs after a crash or while
+            # iterating on chunking parameters cost almost no Nebius calls.
+            unique_embeddings = embed_with_cache(client, embed_texts, NEBIUS_EMBED_MODEL)
+
+            # Fan the unique vectors back out to every node (duplicates share one).
+            embeddings = [unique_embeddings[hash_slot[h]] for h in _w_hashes]
+        except Exception as e:
+            print(f"[INDEX][embed error] {e}")
+            raise HTTPException(status_code=500, detail="Nebius embedding request failed")
+
+        # Sanity check: ensure we got one embedding per node in this window
+        if len(embeddings) != len(_w_hashes):
+            print(f"[INDEX][embed mismatch] window={len(_w_hashes)} vs embeds={len(embeddings)}")
+            raise HTTPException(status_code=500, detail="Embedding count mismatch")
+
+        # Convert embeddings to a contiguous float32 matrix that FAISS expects: shape [num_vectors, embedding_dim]
+        # FAISS operates on float32 arrays; this makes dtype and memory layout compatible and fast.
+        # Fused assembly: truncate and L2-normalize each row while it is being
+        # copied into the preallocated matrix, instead of a second full-matrix
+        # faiss.normalize_L2 pass that re-streams every 4-16 KB row through
+        # DRAM. Normalizing after truncation keeps the sliced vectors unit
+        # length, so inner product stays cosine-like.
+        _full = len(embeddings[0]) if embeddings else 0
+        _dim = min(_full, EMBED_DIM_TRUNCATE) if EMBED_DIM_TRUNCATE else _full
+        X = np.empty((len(embeddings), _dim), dtype=np.float32)
+        for _i, _vec in enumerate(embeddings):
+            _row = np.asarray(_vec, dtype=np.float32)[:_dim]
+            _nrm = float(np.linalg.norm(_row))
+            X[_i, :] = _row / _nrm if _nrm > 0.0 else _row
+        if X.ndim != 2 or X.shape[0] == 0:
+            raise HTTPException(status_code=500, detail="No embeddings to index")
+        # Rows were L2-normalized during assembly above (IP of unit vectors = cosine).
+
+        with _INDEX_LOCK:
+            if index is None:
+                # First window: the embedding dimensionality is known now, so open
+                # (or create) the index and run the dim consistency checks here.
+                # dim must stay constant across all batches for the same index.
+                dim = int(X.shape[1])
+
+                # If an index exists (in memory from a prior batch, or on disk),
+                # validate dimension; else create new.
+                # IndexFlatIP uses inner product; combined with L2 normalization this yields cosine-like retrieval.
+                index = _load_live_index(faiss_path)
+                if index is not None:
+                    if int(index.d) != dim:
+                        raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: index has {int(index.d)}, new vectors have {dim}")
+                    print(f"[INDEX][FAISS] Using existing index (ntotal={index.ntotal}, dim={int(index.d)})")
+                else:
+                    # Scalar-quantized storage (see _new_index / FAISS_QUANT): at 4096
+                    # dims fp16 stores 8 KB per chunk instead of 16 KB, sq8 4 KB.
+                    # Vectors are L2-normalized above, so inner product stays
+                    # cosine-like. Existing indexes keep loading via the branch above.
+                    # The IDMap2 wrapper stores each vector under its stable chunk
+                    # id (see _faiss_id) instead of a row position.
+                    index = faiss.IndexIDMap2(_new_index(dim))
+                    if not index.is_trained:
+                        index.train(X)  # sq8 learns its per-dimension ranges from the first window
+                    print(f"[INDEX][FAISS] Created new index (FAISS_QUANT={FAISS_QUANT}, IDMap2) dim={dim}")
+
+                # Persist/verify dimension helper file
+                try:
+                    if os.path.isfile(dim_path):
+                        try:
+                            # 'with' is a Python context manager: it opens the file and guarantees it will be closed automatically.
+                            with open(dim_path, "r", encoding="utf-8") as g:
+                                prev_dim = int((g.read() or "").strip() or "0")
+                            if prev_dim != dim:
+                                raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: stored dim.txt={prev_dim}, new vectors have {dim}")
+                        except ValueError:
+                            print("[INDEX][FAISS dim warn] dim.txt is not an integer; rewriting")
+                            with open(dim_path, "w", encoding="utf-8") as g:  # context manager ensures the file is closed properly
+                                g.write(str(dim))
+                    else:
+                        with open(dim_path, "w", encoding="utf-8") as g:  # first-time write of the embedding dimension
+                            g.write(str(dim))
+                except HTTPException:
+                    raise
+                except Exception as e:
+                    print(f"[INDEX][FAISS dim write warn] {e}")
+
+            # Append this window's vectors; the per-window matrix is garbage as
+            # soon as the next iteration rebinds X.
+            if hasattr(index, "id_map"):
+                fids = np.fromiter(
+                    (_faiss_id(nid) for nid in _w_ids), dtype=np.int64, count=len(_w_ids)
+                )
+                try:
+                    # Only changed chunks survive the upsert filter above, so any
+                    # vector already stored under one of these ids is stale —
+                    # drop it first for true update semantics.
+                    index.remove_ids(fids)
+                except RuntimeError:
+                    pass  # inner index type without remove support
+                index.add_with_ids(X, fids)
+            else:
+                index.add(X)  # legacy positional index
+            _mark_index_dirty(int(X.shape[0]))
+        print(f"[INDEX][FAISS] streamed window rows={X.shape[0]} (ntotal={index.ntotal})")
     try:
-        # 'a' = append mode; preserves previous content and adds new lines for the current batch
-        # 'f' is the opened writable file handle; the context manager ensures it is closed automatically
-        with open(meta_path, "a", encoding="utf-8") as f:
-            # zip iterates the three equal-length lists in lockstep: (node_id, node_text, node_meta) per vector
-            # Fields:
-            #   - id: the node identifier (string)
-            #   - text: the chunk text associated with the vector (string)
-            #   - meta: cleaned metadata dict for the node (dict of primitive/JSON-serializable values)
-            for _id, _txt, _meta in zip(node_ids, node_texts, node_metas):
-                # ensure_ascii=False preserves non-ASCII characters as UTF-8 instead of escaping
-                # the trailing "\n" ensures exactly one JSON object per line (JSONL format)
-                f.write(json.dumps({"id": _id, "text": _txt, "meta": _meta}, ensure_ascii=False) + "\n")
-        print(f"[INDEX][FAISS] Appended metadata JSONL: {meta_path} (+{len(node_ids)} lines)")
+        with _INDEX_LOCK:
+            upgraded = _maybe_upgrade_index(index)
+            _set_live_index(upgraded)
+            # Keyed store first: queries on the live index resolve fresh hits
+            # here by stable chunk id, and an orphan row after a crash is
+            # harmless — nothing skips work based on meta.db.
+            _store_chunk_meta(node_ids, node_texts, node_metas)
+            # meta.jsonl lines, the parquet sidecar and indexed_ids.txt are
+            # queued and written only by the checkpoint (_drain_pending_records),
+            # so the skip records can never outlive the vectors they cover.
+            _queue_batch_records(
+                node_ids, node_texts, node_metas,
+                [d.doc_id for d in docs], upgraded.ntotal - len(node_ids),
+            )
+            # Checkpoint only when enough rows accumulated (or right after a
+            # structural migration — that work must not be redone on a crash).
+            if not _flush_live_index(faiss_path, force=upgraded is not index):
+                print(f"[INDEX][FAISS] checkpoint deferred (ntotal={upgraded.ntotal}, dirty<{FAISS_FLUSH_ROWS})")
+            index = upgraded
     except Exception as e:
         print(f"[INDEX][FAISS meta write error] {e}")
         raise HTTPException(status_code=500, detail="Failed to write FAISS metadata JSONL")
@@ -575,7 +1634,7 @@ def index_batch(limit: int = 200, offset: int = 0):
 
         # -- 2) Convert the returned Python list (embedding) into a float32 NumPy array --
         #    FAISS expects float32; shape must be (1, dim) for a single query vector.
-        qvec = np.array(q_emb_resp.data[0].embedding, dtype="float32").reshape(1, -1)
+        qvec = _truncate_dims(np.array(q_emb_resp.data[0].embedding, dtype="float32").reshape(1, -1))
 
         # -- 3) L2-normalize the query vector --
         #    Because we used IndexFlatIP and normalized stored vectors, we normalize the query as well
@@ -584,36 +1643,36 @@ def index_batch(limit: int = 200, offset: int = 0):
 
         # -- 4) Load the FAISS index that we just persisted (or appended to) in this batch --
         faiss_path = os.path.join(FAISS_DIR, "index.faiss")
-        q_index = faiss.read_index(faiss_path)
+        # Query path: live in-memory index when batches have run in this
+        # process (fresh rows visible), else a read-only mmap of the file.
+        q_index = _load_query_index(faiss_path)
 
         # -- 5) Run the similarity search: returns scores (D) and indices (I) --
         #    D: similarity scores (higher is more similar for IP/cosine)
         #    I: integer indices into the vector store (aligned with meta.jsonl line order)
         D, I = q_index.search(qvec, query_top_k)
 
-        # -- 6) Load metadata lines so we can map FAISS indices back to texts and paper info --
-        meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-        with open(meta_path, "r", encoding="utf-8") as f:
-            meta_lines = [json.loads(l) for l in f]
+        # -- 6) Resolve FAISS output back to metadata records --
+        #    _resolve_hits hides the two index generations: IDMap2 indexes
+        #    return stable chunk ids (looked up in meta.db), legacy indexes
+        #    return row positions (looked up in row-aligned meta.jsonl).
+        records = _resolve_hits(q_index, I[0].tolist())
 
         # -- 7) Build a lightweight result list of the top-k chunks --
         #    We attach score and a small preview of the text for quick debugging.
         #
         #    Notes on FAISS outputs and variables used below:
         #    - D: shape [1, top_k] similarity scores; higher means more similar for IP/cosine.
-        #    - I: shape [1, top_k] integer indices; each index points to a vector we added earlier.
-        #      The indices align 1:1 with lines in meta.jsonl because we wrote metadata in the
-        #      exact same order we appended vectors to the FAISS index.
+        #    - I: shape [1, top_k] ids/indices; each points to a vector we added earlier.
         #    - enumerate(zip(...), start=1) yields (rank, (score, idx)) per hit:
         #      * rank: 1-based position in the ranked list (1 = best match).
         #      * score: similarity for this hit (float).
-        #      * idx: integer position used to look up meta_lines[idx].
+        #      * idx: id/index used to look up its record in `records`.
         #    This loop materializes a compact list of hit dicts for easy printing/inspection.
         query_hits = []
         for rank, (score, idx) in enumerate(zip(D[0].tolist(), I[0].tolist()), start=1):
-            if 0 <= idx < len(meta_lines):
-                # Map FAISS index -> metadata record; same order ensures stable alignment.
-                rec = meta_lines[idx]
+            rec = records.get(idx)
+            if rec is not None:
                 # Optional: shorten the text for terminal readability
                 preview_text = rec.get("text", "")
                 if len(preview_text) > 300:
@@ -712,110 +1771,26 @@ def index_batch(limit: int = 200, offset: int = 0):
         "Content-Type": "application/json",
     }
 
-    # Ensure 'meta_lines' is available (loaded earlier in the query phase). Reload if missing.
-    if "meta_lines" not in locals():
-        meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-        with open(meta_path, "r", encoding="utf-8") as f:
-            meta_lines = [json.loads(l) for l in f]
-
-    # Collect extraction outputs here
-    extractions = []
+    # Full chunk texts were already resolved with the hits; no reload needed.
+    # (records is absent only if the query phase itself failed above.)
+    if "records" not in locals():
+        records = {}
+    fulltext_by_node = {r.get("id"): r.get("text", "") for r in records.values()}
 
-    # Iterate over each hit (chunk) and call the LLM once per chunk.
+    # Each chunk extraction is independent, so fan them out with bounded
+    # concurrency over one keep-alive client (see _extract_concurrently);
+    # result order matches hit order.
+    tasks = []
     for i, hit in enumerate(query_hits[:max_chunks_for_extraction], start=1):
-        # Find the full text by 'id' (unique node id created by LlamaIndex SentenceSplitter)
-        node_id = hit.get("id")
-        full_text = ""
-        for rec in meta_lines:
-            if rec.get("id") == node_id:
-                full_text = rec.get("text", "")
-                break
-
+        # Find the full text by 'id' (deterministic node id assigned at split time).
         # Safety: if for some reason we didn't find it, fall back to preview.
-        if not full_text:
-            full_text = hit.get("text_preview", "")
-
-        # Compose the user content with chunk text
-        user_content = USER_INSTRUCTION_PREFIX + full_text + USER_INSTRUCTION_SUFFIX
-
-        # Build the payload enforcing JSON schema
-        payload = {
-            "model": NEBIUS_MODEL,
-            "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_content}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 600,
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": extraction_schema
-            }
-        }
-
-        # print(f"[EXTRACT] Calling Nebius LLM for chunk #{i} | PMCID={hit.get('pmcid','')} | title='{hit.get('title','')[:80]}'")
-        try:
-            with httpx.Client(timeout=90) as neb_client:
-                resp = neb_client.post(neb_url, json=payload, headers=neb_headers)
-            # print(f"[EXTRACT] HTTP {resp.status_code}")
-
-            # Try to parse model's JSON response
-            data = resp.json()
-            # Defensive parsing: choices → message → content (JSON as string)
-            content = ""
-            if isinstance(data, dict) and "choices" in data and data["choices"]:
-                content = data["choices"][0]["message"]["content"] or ""
-
-            extracted_obj = {}
-            if content:
-                try:
-                    extracted_obj = json.loads(content)
-                except json.JSONDecodeError:
-                    # If schema mode was not obeyed due to model drift, keep raw content for debugging.
-                    extracted_obj = {"_raw": content}
-
-            # Attach hit metadata for provenance
-            extracted_obj["_provenance"] = {
-                "pmcid": hit.get("pmcid", ""),
-                "doi": hit.get("doi", ""),
-                "title": hit.get("title", ""),
-                "year": hit.get("year", 0),
-                "journal": hit.get("journal", ""),
-                "source_url": hit.get("source_url", ""),
-                "rank": hit.get("rank", i),
-                "score": hit.get("score", None),
-                "node_id": node_id,
-            }
-
-            # Store in RAM list
-            extractions.append(extracted_obj)
-
-            # Pretty-print a compact summary to terminal
-            try:
-                # print(
-                #     "[EXTRACT][OK]",
-                #     f"protein={extracted_obj.get('protein','')!r}",
-                #     f"mod={extracted_obj.get('modification','')!r}",
-                #     f"fx={extracted_obj.get('functional_effect','')!r}",
-                #     f"longevity={extracted_obj.get('longevity_effect','')!r}",
-                #     f"conf={extracted_obj.get('confidence', 0.0)}",
-                # )
-                pass
-            except Exception:
-                print("[EXTRACT][OK] (unprintable chars)")
+        full_text = fulltext_by_node.get(hit.get("id")) or hit.get("text_preview", "")
+        tasks.append((hit, USER_INSTRUCTION_PREFIX + full_text + USER_INSTRUCTION_SUFFIX, i))
 
-        except Exception as e:
-            print(f"[EXTRACT][error] {e}")
-            # Keep going; append minimal error record for visibility
-            extractions.append({
-                "_error": str(e),
-                "_provenance": {
-                    "pmcid": hit.get("pmcid", ""),
-                    "title": hit.get("title", ""),
-                    "rank": hit.get("rank", i),
-                    "node_id": node_id,
-                }
-            })
+    extractions = _extract_concurrently(
+        tasks, extraction_schema, SYSTEM_PROMPT, neb_url, neb_headers,
+        max_tokens=600,
+    )
 
     # Final log: how many extractions we collected
     print(f"[EXTRACT] Completed {len(extractions)}/{max_chunks_for_extraction} chunk extractions.")
@@ -902,14 +1877,18 @@ def index_batch(limit: int = 200, offset: int = 0):
     print(f"[ARTICLE] Generating HTML article for protein={protein_name!r} using {NEBIUS_MODEL}")
 
     try:
+        abody, ahdrs = _gzip_body(
+            orjson.dumps(article_payload),
+            {
+                "Authorization": f"Bearer {settings.nebius_api_key}",
+                "Content-Type": "application/json",
+            },
+        )
         with httpx.Client(timeout=120) as neb_client:
             aresp = neb_client.post(
                 f"{NEBIUS_BASE_URL}chat/completions",
-                json=article_payload,
-                headers={
-                    "Authorization": f"Bearer {settings.nebius_api_key}",
-                    "Content-Type": "application/json",
-                },
+                content=abody,
+                headers=ahdrs,
             )
         print(f"[ARTICLE] HTTP {aresp.status_code}")
 
@@ -1028,8 +2007,7 @@ def index_faiss_batch(
         print(f"[INDEX] Folder '{PAPERS_DIR}' does not exist. Create it and drop JSON files inside.")
         return {"status": "ok"}
 
-    all_files = [os.path.join(PAPERS_DIR, fn) for fn in os.listdir(PAPERS_DIR) if fn.endswith(".json")]
-    all_files.sort()
+    all_files = _list_papers(os.stat(PAPERS_DIR).st_mtime)
 
     # --- Optional scoring and Top-N selection (streaming) ---
     selected_paths = all_files
@@ -1038,8 +2016,7 @@ def index_faiss_batch(
         bad = 0
         for p in all_files:
             try:
-                with open(p, "r", encoding="utf-8") as f:
-                    paper = json.load(f)
+                paper = _read_paper_json(p)
                 sc = _score_paper(paper)
                 scored.append((sc, p))
             except Exception:
@@ -1058,13 +2035,22 @@ def index_faiss_batch(
         print("[INDEX-ONLY] Nothing to do for this batch.")
         return {"status": "ok", "files": 0}
 
-    # --- Build Documents ---
+    # --- Build Documents (reads+parses overlapped in a small pool, as in /index/batch) ---
+    def _safe_read(path: str):
+        try:
+            return _read_paper_json(path)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=16) as io_pool:
+        papers = list(io_pool.map(_safe_read, files))
+
     docs: List[Document] = []
     skipped_empty = 0
-    for path in files:
+    for path, paper in zip(files, papers):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                paper: Dict[str, Any] = json.load(f)
+            if isinstance(paper, Exception):
+                raise paper
             text = (paper.get("plain_text") or "").strip()
             if not text:
                 skipped_empty += 1
@@ -1093,39 +2079,32 @@ def index_faiss_batch(
         print("[INDEX-ONLY] No usable documents in this batch (empty/plain_text or load fail).")
         return {"status": "ok", "docs": 0}
 
-    # --- Chunking ---
-    splitter = SentenceSplitter(chunk_size=800, chunk_overlap=120)
-    nodes = splitter.get_nodes_from_documents(docs)
+    # Doc-level skip: anything indexed by a previous batch is dropped before
+    # splitting (see INDEXED_IDS_PATH).
+    _seen_ids = _load_indexed_ids()
+    if _seen_ids:
+        _before = len(docs)
+        docs = [d for d in docs if d.doc_id not in _seen_ids]
+        if len(docs) < _before:
+            print(f"[INDEX-ONLY] docs_skipped_already_indexed={_before - len(docs)}")
+        if not docs:
+            print(f"[INDEX-ONLY] All documents in this batch already indexed.")
+            return {"status": "ok"}
+
+    # --- Chunking (module-level splitter; built once per process) ---
+    nodes = _split_documents(docs)
     print(f"[INDEX-ONLY] chunks_created={len(nodes)}")
     if not nodes:
         print("[INDEX-ONLY] No chunks created.")
         return {"status": "ok", "chunks": 0}
 
     # --- Embeddings via Nebius ---
-    print("[INDEX-ONLY] Creating OpenAI client for Nebius...")
-    client = OpenAI(api_key=settings.nebius_api_key, base_url=NEBIUS_BASE_URL)
+    print("[INDEX-ONLY] Using shared OpenAI client for Nebius...")
+    client = _nebius_client()
     node_ids = [n.id_ for n in nodes]
     node_texts = [n.get_content(metadata_mode="none") for n in nodes]
     print(f"[INDEX-ONLY] Prepared {len(node_ids)} node IDs and {len(node_texts)} texts")
 
-    def clean_metadata_for_chroma(meta: Dict[str, Any]) -> Dict[str, Any]:
-        cleaned = {}
-        for key, value in (meta or {}).items():
-            if value is None:
-                if key == "year":
-                    cleaned[key] = 0
-                else:
-                    cleaned[key] = ""
-            elif isinstance(value, (str, int, float, bool)):
-                cleaned[key] = value
-            elif isinstance(value, list):
-                cleaned[key] = json.dumps(value)
-            elif isinstance(value, dict):
-                cleaned[key] = json.dumps(value)
-            else:
-                cleaned[key] = str(value)
-        return cleaned
-
     print("[INDEX-ONLY] Cleaning metadata for Chroma...")
     node_metas = [clean_metadata_for_chroma(n.metadata) for n in nodes]
     print(f"[INDEX-ONLY] Cleaned {len(node_metas)} metadata entries")
@@ -1140,8 +2119,12 @@ def index_faiss_batch(
             batch_num = start // emb_batch_size + 1
             if batch_num == 1 or batch_num % 10 == 0 or batch_num == total_batches:
                 print(f"[INDEX-ONLY][EMB] batch {batch_num}/{total_batches} (+{len(batch)} texts)")
-            resp = client.embeddings.create(model=NEBIUS_EMBED_MODEL, input=batch)
-            embeddings.extend([item.embedding for item in resp.data])
+            resp = client.embeddings.create(
+                model=NEBIUS_EMBED_MODEL,
+                input=batch,
+                **({"encoding_format": "base64"} if EMBED_B64 else {}),
+            )
+            embeddings.extend([_decode_embedding(item.embedding) for item in resp.data])
         print(f"[INDEX-ONLY] Total embeddings: {len(embeddings)}")
     except Exception as e:
         print(f"[INDEX-ONLY][embed error] {e}")
@@ -1162,56 +2145,85 @@ def index_faiss_batch(
         print(f"[INDEX-ONLY][FAISS dir error] {e}")
         raise HTTPException(status_code=500, detail="Failed to create FAISS directory (index-only)")
 
-    X = np.array(embeddings, dtype="float32")
+    # Fused assembly: truncate and L2-normalize each row while it is being
+    # copied into the preallocated matrix, instead of a second full-matrix
+    # faiss.normalize_L2 pass that re-streams every 4-16 KB row through
+    # DRAM. Normalizing after truncation keeps the sliced vectors unit
+    # length, so inner product stays cosine-like.
+    _full = len(embeddings[0]) if embeddings else 0
+    _dim = min(_full, EMBED_DIM_TRUNCATE) if EMBED_DIM_TRUNCATE else _full
+    X = np.empty((len(embeddings), _dim), dtype=np.float32)
+    for _i, _vec in enumerate(embeddings):
+        _row = np.asarray(_vec, dtype=np.float32)[:_dim]
+        _nrm = float(np.linalg.norm(_row))
+        X[_i, :] = _row / _nrm if _nrm > 0.0 else _row
     if X.ndim != 2 or X.shape[0] == 0:
         raise HTTPException(status_code=500, detail="No embeddings to index (index-only)")
-    faiss.normalize_L2(X)
 
     dim = int(X.shape[1])
     faiss_path = os.path.join(FAISS_DIR, "index.faiss")
     dim_path = os.path.join(FAISS_DIR, "dim.txt")
 
-    if os.path.isfile(faiss_path):
-        index = faiss.read_index(faiss_path)
-        if int(index.d) != dim:
-            raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: index has {int(index.d)}, new vectors have {dim}")
-        print(f"[INDEX-ONLY][FAISS] Loaded existing index: {faiss_path} (ntotal={index.ntotal}, dim={int(index.d)})")
-    else:
-        index = faiss.IndexFlatIP(dim)
-        print(f"[INDEX-ONLY][FAISS] Created new IndexFlatIP dim={dim}")
+    with _INDEX_LOCK:
+        index = _load_live_index(faiss_path)
+        if index is not None:
+            if int(index.d) != dim:
+                raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: index has {int(index.d)}, new vectors have {dim}")
+            print(f"[INDEX-ONLY][FAISS] Using existing index (ntotal={index.ntotal}, dim={int(index.d)})")
+        else:
+            # Quantized storage per FAISS_QUANT, IDMap2-wrapped for stable chunk
+            # ids — same choices as /index/batch.
+            index = faiss.IndexIDMap2(_new_index(dim))
+            if not index.is_trained:
+                index.train(X)
+            print(f"[INDEX-ONLY][FAISS] Created new index (FAISS_QUANT={FAISS_QUANT}, IDMap2) dim={dim}")
 
-    try:
-        if os.path.isfile(dim_path):
-            try:
-                with open(dim_path, "r", encoding="utf-8") as g:
-                    prev_dim = int((g.read() or "").strip() or "0")
-                if prev_dim != dim:
-                    raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: stored dim.txt={prev_dim}, new vectors have {dim}")
-            except ValueError:
-                print("[INDEX-ONLY][FAISS dim warn] dim.txt is not an integer; rewriting")
+        try:
+            if os.path.isfile(dim_path):
+                try:
+                    with open(dim_path, "r", encoding="utf-8") as g:
+                        prev_dim = int((g.read() or "").strip() or "0")
+                    if prev_dim != dim:
+                        raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: stored dim.txt={prev_dim}, new vectors have {dim}")
+                except ValueError:
+                    print("[INDEX-ONLY][FAISS dim warn] dim.txt is not an integer; rewriting")
+                    with open(dim_path, "w", encoding="utf-8") as g:
+                        g.write(str(dim))
+            else:
                 with open(dim_path, "w", encoding="utf-8") as g:
                     g.write(str(dim))
-        else:
-            with open(dim_path, "w", encoding="utf-8") as g:
-                g.write(str(dim))
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"[INDEX-ONLY][FAISS dim write warn] {e}")
-
-    index.add(X)
-    faiss.write_index(index, faiss_path)
-    print(f"[INDEX-ONLY][FAISS] Saved index: {faiss_path} (ntotal={index.ntotal})")
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"[INDEX-ONLY][FAISS dim write warn] {e}")
 
-    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-    try:
-        with open(meta_path, "a", encoding="utf-8") as f:
-            for _id, _txt, _meta in zip(node_ids, node_texts, node_metas):
-                f.write(json.dumps({"id": _id, "text": _txt, "meta": _meta}, ensure_ascii=False) + "\n")
-        print(f"[INDEX-ONLY][FAISS] Appended metadata JSONL: {meta_path} (+{len(node_ids)} lines)")
-    except Exception as e:
-        print(f"[INDEX-ONLY][FAISS meta write error] {e}")
-        raise HTTPException(status_code=500, detail="Failed to write FAISS metadata JSONL (index-only)")
+        if hasattr(index, "id_map"):
+            fids = np.fromiter(
+                (_faiss_id(nid) for nid in node_ids), dtype=np.int64, count=len(node_ids)
+            )
+            index.add_with_ids(X, fids)
+        else:
+            index.add(X)  # legacy positional index
+        _mark_index_dirty(int(X.shape[0]))
+        upgraded = _maybe_upgrade_index(index)
+        _set_live_index(upgraded)
+        try:
+            # Keyed store first: queries on the live index resolve fresh hits
+            # here, and an orphan row after a crash is harmless. meta.jsonl,
+            # the parquet sidecar and indexed_ids.txt are queued and written
+            # only by the checkpoint, so the doc/chunk skip records can never
+            # outlive the vectors they cover.
+            _store_chunk_meta(node_ids, node_texts, node_metas)
+            _queue_batch_records(
+                node_ids, node_texts, node_metas,
+                [d.doc_id for d in docs], upgraded.ntotal - len(node_ids),
+            )
+            if not _flush_live_index(faiss_path, force=upgraded is not index):
+                print(f"[INDEX-ONLY][FAISS] checkpoint deferred (ntotal={upgraded.ntotal}, dirty<{FAISS_FLUSH_ROWS})")
+        except Exception as e:
+            print(f"[INDEX-ONLY][FAISS meta write error] {e}")
+            raise HTTPException(status_code=500, detail="Failed to write FAISS metadata JSONL (index-only)")
+        index = upgraded
 
     print("[INDEX-ONLY] Batch done (FAISS append).")
     return {"status": "ok", "files": len(files), "docs": len(docs), "chunks": len(node_ids)}
@@ -1234,8 +2246,7 @@ def index_faiss_batch_without_scoring(limit: int = 200, offset: int = 0):
         print(f"[INDEX] Folder '{PAPERS_DIR}' does not exist. Create it and drop JSON files inside.")
         return {"status": "ok"}
 
-    all_files = [os.path.join(PAPERS_DIR, fn) for fn in os.listdir(PAPERS_DIR) if fn.endswith(".json")]
-    all_files.sort()
+    all_files = _list_papers(os.stat(PAPERS_DIR).st_mtime)
     files = all_files[offset: offset + limit]
 
     print(f"[INDEX-ONLY] files_seen_total={len(all_files)} | batch_offset={offset} | batch_limit={limit} | batch_files={len(files)}")
@@ -1243,13 +2254,22 @@ def index_faiss_batch_without_scoring(limit: int = 200, offset: int = 0):
         print("[INDEX-ONLY] Nothing to do for this batch.")
         return {"status": "ok", "files": 0}
 
-    # --- Build Documents ---
+    # --- Build Documents (reads+parses overlapped in a small pool, as in /index/batch) ---
+    def _safe_read(path: str):
+        try:
+            return _read_paper_json(path)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=16) as io_pool:
+        papers = list(io_pool.map(_safe_read, files))
+
     docs: List[Document] = []
     skipped_empty = 0
-    for path in files:
+    for path, paper in zip(files, papers):
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                paper: Dict[str, Any] = json.load(f)
+            if isinstance(paper, Exception):
+                raise paper
             text = (paper.get("plain_text") or "").strip()
             if not text:
                 skipped_empty += 1
@@ -1278,39 +2298,32 @@ def index_faiss_batch_without_scoring(limit: int = 200, offset: int = 0):
         print("[INDEX-ONLY] No usable documents in this batch (empty/plain_text or load fail).")
         return {"status": "ok", "docs": 0}
 
-    # --- Chunking ---
-    splitter = SentenceSplitter(chunk_size=800, chunk_overlap=120)
-    nodes = splitter.get_nodes_from_documents(docs)
+    # Doc-level skip: anything indexed by a previous batch is dropped before
+    # splitting (see INDEXED_IDS_PATH).
+    _seen_ids = _load_indexed_ids()
+    if _seen_ids:
+        _before = len(docs)
+        docs = [d for d in docs if d.doc_id not in _seen_ids]
+        if len(docs) < _before:
+            print(f"[INDEX-ONLY] docs_skipped_already_indexed={_before - len(docs)}")
+        if not docs:
+            print(f"[INDEX-ONLY] All documents in this batch already indexed.")
+            return {"status": "ok"}
+
+    # --- Chunking (module-level splitter; built once per process) ---
+    nodes = _split_documents(docs)
     print(f"[INDEX-ONLY] chunks_created={len(nodes)}")
     if not nodes:
         print("[INDEX-ONLY] No chunks created.")
         return {"status": "ok", "chunks": 0}
 
     # --- Embeddings via Nebius ---
-    print("[INDEX-ONLY] Creating OpenAI client for Nebius...")
-    client = OpenAI(api_key=settings.nebius_api_key, base_url=NEBIUS_BASE_URL)
+    print("[INDEX-ONLY] Using shared OpenAI client for Nebius...")
+    client = _nebius_client()
     node_ids = [n.id_ for n in nodes]
     node_texts = [n.get_content(metadata_mode="none") for n in nodes]
     print(f"[INDEX-ONLY] Prepared {len(node_ids)} node IDs and {len(node_texts)} texts")
 
-    def clean_metadata_for_chroma(meta: Dict[str, Any]) -> Dict[str, Any]:
-        cleaned = {}
-        for key, value in (meta or {}).items():
-            if value is None:
-                if key == "year":
-                    cleaned[key] = 0
-                else:
-                    cleaned[key] = ""
-            elif isinstance(value, (str, int, float, bool)):
-                cleaned[key] = value
-            elif isinstance(value, list):
-                cleaned[key] = json.dumps(value)
-            elif isinstance(value, dict):
-                cleaned[key] = json.dumps(value)
-            else:
-                cleaned[key] = str(value)
-        return cleaned
-
     print("[INDEX-ONLY] Cleaning metadata for Chroma...")
     node_metas = [clean_metadata_for_chroma(n.metadata) for n in nodes]
     print(f"[INDEX-ONLY] Cleaned {len(node_metas)} metadata entries")
@@ -1326,8 +2339,12 @@ def index_faiss_batch_without_scoring(limit: int = 200, offset: int = 0):
             batch_num = start // BATCH_SIZE + 1
             if batch_num == 1 or batch_num % 10 == 0 or batch_num == total_batches:
                 print(f"[INDEX-ONLY][EMB] batch {batch_num}/{total_batches} (+{len(batch)} texts)")
-            resp = client.embeddings.create(model=NEBIUS_EMBED_MODEL, input=batch)
-            embeddings.extend([item.embedding for item in resp.data])
+            resp = client.embeddings.create(
+                model=NEBIUS_EMBED_MODEL,
+                input=batch,
+                **({"encoding_format": "base64"} if EMBED_B64 else {}),
+            )
+            embeddings.extend([_decode_embedding(item.embedding) for item in resp.data])
         print(f"[INDEX-ONLY] Total embeddings: {len(embeddings)}")
     except Exception as e:
         print(f"[INDEX-ONLY][embed error] {e}")
@@ -1348,56 +2365,85 @@ def index_faiss_batch_without_scoring(limit: int = 200, offset: int = 0):
         print(f"[INDEX-ONLY][FAISS dir error] {e}")
         raise HTTPException(status_code=500, detail="Failed to create FAISS directory (index-only)")
 
-    X = np.array(embeddings, dtype="float32")
+    # Fused assembly: truncate and L2-normalize each row while it is being
+    # copied into the preallocated matrix, instead of a second full-matrix
+    # faiss.normalize_L2 pass that re-streams every 4-16 KB row through
+    # DRAM. Normalizing after truncation keeps the sliced vectors unit
+    # length, so inner product stays cosine-like.
+    _full = len(embeddings[0]) if embeddings else 0
+    _dim = min(_full, EMBED_DIM_TRUNCATE) if EMBED_DIM_TRUNCATE else _full
+    X = np.empty((len(embeddings), _dim), dtype=np.float32)
+    for _i, _vec in enumerate(embeddings):
+        _row = np.asarray(_vec, dtype=np.float32)[:_dim]
+        _nrm = float(np.linalg.norm(_row))
+        X[_i, :] = _row / _nrm if _nrm > 0.0 else _row
     if X.ndim != 2 or X.shape[0] == 0:
         raise HTTPException(status_code=500, detail="No embeddings to index (index-only)")
-    faiss.normalize_L2(X)
 
     dim = int(X.shape[1])
     faiss_path = os.path.join(FAISS_DIR, "index.faiss")
     dim_path = os.path.join(FAISS_DIR, "dim.txt")
 
-    if os.path.isfile(faiss_path):
-        index = faiss.read_index(faiss_path)
-        if int(index.d) != dim:
-            raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: index has {int(index.d)}, new vectors have {dim}")
-        print(f"[INDEX-ONLY][FAISS] Loaded existing index: {faiss_path} (ntotal={index.ntotal}, dim={int(index.d)})")
-    else:
-        index = faiss.IndexFlatIP(dim)
-        print(f"[INDEX-ONLY][FAISS] Created new IndexFlatIP dim={dim}")
+    with _INDEX_LOCK:
+        index = _load_live_index(faiss_path)
+        if index is not None:
+            if int(index.d) != dim:
+                raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: index has {int(index.d)}, new vectors have {dim}")
+            print(f"[INDEX-ONLY][FAISS] Using existing index (ntotal={index.ntotal}, dim={int(index.d)})")
+        else:
+            # Quantized storage per FAISS_QUANT, IDMap2-wrapped for stable chunk
+            # ids — same choices as /index/batch.
+            index = faiss.IndexIDMap2(_new_index(dim))
+            if not index.is_trained:
+                index.train(X)
+            print(f"[INDEX-ONLY][FAISS] Created new index (FAISS_QUANT={FAISS_QUANT}, IDMap2) dim={dim}")
 
-    try:
-        if os.path.isfile(dim_path):
-            try:
-                with open(dim_path, "r", encoding="utf-8") as g:
-                    prev_dim = int((g.read() or "").strip() or "0")
-                if prev_dim != dim:
-                    raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: stored dim.txt={prev_dim}, new vectors have {dim}")
-            except ValueError:
-                print("[INDEX-ONLY][FAISS dim warn] dim.txt is not an integer; rewriting")
+        try:
+            if os.path.isfile(dim_path):
+                try:
+                    with open(dim_path, "r", encoding="utf-8") as g:
+                        prev_dim = int((g.read() or "").strip() or "0")
+                    if prev_dim != dim:
+                        raise HTTPException(status_code=400, detail=f"FAISS dim mismatch: stored dim.txt={prev_dim}, new vectors have {dim}")
+                except ValueError:
+                    print("[INDEX-ONLY][FAISS dim warn] dim.txt is not an integer; rewriting")
+                    with open(dim_path, "w", encoding="utf-8") as g:
+                        g.write(str(dim))
+            else:
                 with open(dim_path, "w", encoding="utf-8") as g:
                     g.write(str(dim))
-        else:
-            with open(dim_path, "w", encoding="utf-8") as g:
-                g.write(str(dim))
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"[INDEX-ONLY][FAISS dim write warn] {e}")
-
-    index.add(X)
-    faiss.write_index(index, faiss_path)
-    print(f"[INDEX-ONLY][FAISS] Saved index: {faiss_path} (ntotal={index.ntotal})")
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"[INDEX-ONLY][FAISS dim write warn] {e}")
 
-    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-    try:
-        with open(meta_path, "a", encoding="utf-8") as f:
-            for _id, _txt, _meta in zip(node_ids, node_texts, node_metas):
-                f.write(json.dumps({"id": _id, "text": _txt, "meta": _meta}, ensure_ascii=False) + "\n")
-        print(f"[INDEX-ONLY][FAISS] Appended metadata JSONL: {meta_path} (+{len(node_ids)} lines)")
-    except Exception as e:
-        print(f"[INDEX-ONLY][FAISS meta write error] {e}")
-        raise HTTPException(status_code=500, detail="Failed to write FAISS metadata JSONL (index-only)")
+        if hasattr(index, "id_map"):
+            fids = np.fromiter(
+                (_faiss_id(nid) for nid in node_ids), dtype=np.int64, count=len(node_ids)
+            )
+            index.add_with_ids(X, fids)
+        else:
+            index.add(X)  # legacy positional index
+        _mark_index_dirty(int(X.shape[0]))
+        upgraded = _maybe_upgrade_index(index)
+        _set_live_index(upgraded)
+        try:
+            # Keyed store first: queries on the live index resolve fresh hits
+            # here, and an orphan row after a crash is harmless. meta.jsonl,
+            # the parquet sidecar and indexed_ids.txt are queued and written
+            # only by the checkpoint, so the doc/chunk skip records can never
+            # outlive the vectors they cover.
+            _store_chunk_meta(node_ids, node_texts, node_metas)
+            _queue_batch_records(
+                node_ids, node_texts, node_metas,
+                [d.doc_id for d in docs], upgraded.ntotal - len(node_ids),
+            )
+            if not _flush_live_index(faiss_path, force=upgraded is not index):
+                print(f"[INDEX-ONLY][FAISS] checkpoint deferred (ntotal={upgraded.ntotal}, dirty<{FAISS_FLUSH_ROWS})")
+        except Exception as e:
+            print(f"[INDEX-ONLY][FAISS meta write error] {e}")
+            raise HTTPException(status_code=500, detail="Failed to write FAISS metadata JSONL (index-only)")
+        index = upgraded
 
     print("[INDEX-ONLY] Batch done (FAISS append).")
     return {"status": "ok", "files": len(files), "docs": len(docs), "chunks": len(node_ids)}
@@ -1413,7 +2459,7 @@ def article_generate(query: Optional[str] = None, top_k: int = 300, protein_name
     """
 
     # Prepare Nebius client
-    client = OpenAI(api_key=settings.nebius_api_key, base_url=NEBIUS_BASE_URL)
+    client = _nebius_client()
 
     # Prepare query
     #QUERY = query or "APOE variant longevity lifespan"
@@ -1424,22 +2470,24 @@ def article_generate(query: Optional[str] = None, top_k: int = 300, protein_name
     try:
         print(f"[ARTICLE][query] Starting FAISS query (top_k={query_top_k})...")
         q_emb_resp = client.embeddings.create(model=NEBIUS_EMBED_MODEL, input=[QUERY])
-        qvec = np.array(q_emb_resp.data[0].embedding, dtype="float32").reshape(1, -1)
+        qvec = _truncate_dims(np.array(q_emb_resp.data[0].embedding, dtype="float32").reshape(1, -1))
         faiss.normalize_L2(qvec)
 
         faiss_path = os.path.join(FAISS_DIR, "index.faiss")
-        q_index = faiss.read_index(faiss_path)
+        # Query path: live in-memory index when batches have run in this
+        # process (fresh rows visible), else a read-only mmap of the file.
+        q_index = _load_query_index(faiss_path)
 
         D, I = q_index.search(qvec, query_top_k)
 
-        meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-        with open(meta_path, "r", encoding="utf-8") as f:
-            meta_lines = [json.loads(l) for l in f]
+        # IDMap2 indexes return stable chunk ids (resolved via meta.db);
+        # legacy indexes return row positions (resolved via meta.jsonl).
+        records = _resolve_hits(q_index, I[0].tolist())
 
         query_hits = []
         for rank, (score, idx) in enumerate(zip(D[0].tolist(), I[0].tolist()), start=1):
-            if 0 <= idx < len(meta_lines):
-                rec = meta_lines[idx]
+            rec = records.get(idx)
+            if rec is not None:
                 preview_text = rec.get("text", "")
                 if len(preview_text) > 300:
                     preview_text = preview_text[:300] + "…"
@@ -1505,19 +2553,19 @@ def article_generate(query: Optional[str] = None, top_k: int = 300, protein_name
         "Content-Type": "application/json",
     }
 
-    # Ensure meta_lines is loaded (from above during query mapping)
-    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-    with open(meta_path, "r", encoding="utf-8") as f:
-        meta_lines = [json.loads(l) for l in f]
+    # Full chunk texts were already resolved with the hits (records above);
+    # no need to re-read the metadata store.
+    fulltext_by_node = {r.get("id"): r.get("text", "") for r in records.values()}
 
-    extractions = []
-    # NEW: Full-document extraction with PMCID-level deduplication
-    # We iterate over hits (chunks) but perform at most one extraction per PMCID.
+    # NEW: Full-document extraction with PMCID-level deduplication.
+    # The dedup pass over hits stays sequential (seen_pmcids is order-
+    # dependent), then the surviving papers fan out with bounded concurrency
+    # over one keep-alive client (see _extract_concurrently).
     pmcid_to_text = load_pmcid_to_text(PAPERS_DIR)
     seen_pmcids = set()
     total_hits = len(query_hits)
-    processed_papers = 0
     print(f"[ARTICLE][extract] Starting extraction over {total_hits} hits (dedup by PMCID).")
+    tasks = []
     for i, hit in enumerate(query_hits, start=1):
         pmcid = (hit.get("pmcid") or "").strip()
         if pmcid and pmcid in seen_pmcids:
@@ -1528,73 +2576,19 @@ def article_generate(query: Optional[str] = None, top_k: int = 300, protein_name
 
         # Fallbacks: if no PMCID or no plain text, fall back to the chunk text
         if not full_text:
-            node_id = hit.get("id")
-            for rec in meta_lines:
-                if rec.get("id") == node_id:
-                    full_text = rec.get("text", "")
-                    break
-            if not full_text:
-                full_text = hit.get("text_preview", "")
+            full_text = fulltext_by_node.get(hit.get("id")) or hit.get("text_preview", "")
 
         if pmcid:
             seen_pmcids.add(pmcid)
 
         # Compose the user content with the full paper text (or fallback)
-        user_content = USER_INSTRUCTION_PREFIX + full_text + USER_INSTRUCTION_SUFFIX
-        payload = {
-            "model": NEBIUS_MODEL,
-            "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_content}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 1024,
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": extraction_schema
-            }
-        }
+        tasks.append((hit, USER_INSTRUCTION_PREFIX + full_text + USER_INSTRUCTION_SUFFIX, i))
 
-        try:
-            with httpx.Client(timeout=90) as neb_client:
-                resp = neb_client.post(neb_url, json=payload, headers=neb_headers)
-            # Try to parse model's JSON response
-            data = resp.json()
-            content = ""
-            if isinstance(data, dict) and "choices" in data and data["choices"]:
-                content = data["choices"][0]["message"]["content"] or ""
-            extracted_obj = {}
-            if content:
-                try:
-                    extracted_obj = json.loads(content)
-                except json.JSONDecodeError:
-                    extracted_obj = {"_raw": content}
-            extracted_obj["_provenance"] = {
-                "pmcid": hit.get("pmcid", ""),
-                "doi": hit.get("doi", ""),
-                "title": hit.get("title", ""),
-                "year": hit.get("year", 0),
-                "journal": hit.get("journal", ""),
-                "source_url": hit.get("source_url", ""),
-                "rank": hit.get("rank", i),
-                "score": hit.get("score", None),
-                "node_id": hit.get("id"),
-            }
-            extractions.append(extracted_obj)
-            processed_papers += 1
-            if processed_papers % 10 == 0:
-                print(f"[ARTICLE][extract] {processed_papers} papers extracted so far...")
-        except Exception as e:
-            print(f"[ARTICLE][extract error] {e}")
-            extractions.append({
-                "_error": str(e),
-                "_provenance": {
-                    "pmcid": hit.get("pmcid", ""),
-                    "title": hit.get("title", ""),
-                    "rank": hit.get("rank", i),
-                    "node_id": hit.get("id"),
-                }
-            })
+    extractions = _extract_concurrently(
+        tasks, extraction_schema, SYSTEM_PROMPT, neb_url, neb_headers,
+        max_tokens=1024,
+    )
+    processed_papers = sum(1 for ex in extractions if "_error" not in ex)
 
     print(f"[ARTICLE] Completed {processed_papers} paper-level extractions (from {total_hits} hits, dedup by PMCID={len(seen_pmcids)}).")
 
@@ -1666,14 +2660,18 @@ def article_generate(query: Optional[str] = None, top_k: int = 300, protein_name
 
     print(f"[ARTICLE] Generating HTML article for protein={protein_name!r} using {NEBIUS_MODEL}")
     try:
+        abody, ahdrs = _gzip_body(
+            orjson.dumps(article_payload),
+            {
+                "Authorization": f"Bearer {settings.nebius_api_key}",
+                "Content-Type": "application/json",
+            },
+        )
         with httpx.Client(timeout=120) as neb_client:
             aresp = neb_client.post(
                 f"{NEBIUS_BASE_URL}chat/completions",
-                json=article_payload,
-                headers={
-                    "Authorization": f"Bearer {settings.nebius_api_key}",
-                    "Content-Type": "application/json",
-                },
+                content=abody,
+                headers=ahdrs,
             )
         print(f"[ARTICLE] HTTP {aresp.status_code}")
 
@@ -1717,7 +2715,7 @@ def article_generate_from_chunks(query: Optional[str] = None, top_k: int = 100,
     """
 
     # Prepare Nebius client
-    client = OpenAI(api_key=settings.nebius_api_key, base_url=NEBIUS_BASE_URL)
+    client = _nebius_client()
 
     # Prepare query
     QUERY = query or "APOE variant longevity lifespan"
@@ -1725,22 +2723,24 @@ def article_generate_from_chunks(query: Optional[str] = None, top_k: int = 100,
 
     try:
         q_emb_resp = client.embeddings.create(model=NEBIUS_EMBED_MODEL, input=[QUERY])
-        qvec = np.array(q_emb_resp.data[0].embedding, dtype="float32").reshape(1, -1)
+        qvec = _truncate_dims(np.array(q_emb_resp.data[0].embedding, dtype="float32").reshape(1, -1))
         faiss.normalize_L2(qvec)
 
         faiss_path = os.path.join(FAISS_DIR, "index.faiss")
-        q_index = faiss.read_index(faiss_path)
+        # Query path: live in-memory index when batches have run in this
+        # process (fresh rows visible), else a read-only mmap of the file.
+        q_index = _load_query_index(faiss_path)
 
         D, I = q_index.search(qvec, query_top_k)
 
-        meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-        with open(meta_path, "r", encoding="utf-8") as f:
-            meta_lines = [json.loads(l) for l in f]
+        # IDMap2 indexes return stable chunk ids (resolved via meta.db);
+        # legacy indexes return row positions (resolved via meta.jsonl).
+        records = _resolve_hits(q_index, I[0].tolist())
 
         query_hits = []
         for rank, (score, idx) in enumerate(zip(D[0].tolist(), I[0].tolist()), start=1):
-            if 0 <= idx < len(meta_lines):
-                rec = meta_lines[idx]
+            rec = records.get(idx)
+            if rec is not None:
                 preview_text = rec.get("text", "")
                 if len(preview_text) > 300:
                     preview_text = preview_text[:300] + "…"
@@ -1805,75 +2805,25 @@ def article_generate_from_chunks(query: Optional[str] = None, top_k: int = 100,
         "Content-Type": "application/json",
     }
 
-    # Ensure meta_lines is loaded (from above during query mapping)
-    meta_path = os.path.join(FAISS_DIR, "meta.jsonl")
-    with open(meta_path, "r", encoding="utf-8") as f:
-        meta_lines = [json.loads(l) for l in f]
+    # Full chunk texts were already resolved with the hits (records above);
+    # no need to re-read the metadata store.
+    fulltext_by_node = {r.get("id"): r.get("text", "") for r in records.values()}
 
-    extractions = []
+    # Independent chunk extractions fan out with bounded concurrency over one
+    # keep-alive client (see _extract_concurrently); result order matches hits.
     max_chunks_for_extraction = len(query_hits)
-    for i, hit in enumerate(query_hits[:max_chunks_for_extraction], start=1):
-        node_id = hit.get("id")
-        full_text = ""
-        for rec in meta_lines:
-            if rec.get("id") == node_id:
-                full_text = rec.get("text", "")
-                break
-        if not full_text:
-            full_text = hit.get("text_preview", "")
-
-        user_content = USER_INSTRUCTION_PREFIX + full_text + USER_INSTRUCTION_SUFFIX
-        payload = {
-            "model": NEBIUS_MODEL,
-            "messages": [
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_content}
-            ],
-            "temperature": 0.1,
-            "max_tokens": 600,
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": extraction_schema
-            }
-        }
-
-        try:
-            with httpx.Client(timeout=90) as neb_client:
-                resp = neb_client.post(neb_url, json=payload, headers=neb_headers)
-            # Try to parse model's JSON response
-            data = resp.json()
-            content = ""
-            if isinstance(data, dict) and "choices" in data and data["choices"]:
-                content = data["choices"][0]["message"]["content"] or ""
-            extracted_obj = {}
-            if content:
-                try:
-                    extracted_obj = json.loads(content)
-                except json.JSONDecodeError:
-                    extracted_obj = {"_raw": content}
-            extracted_obj["_provenance"] = {
-                "pmcid": hit.get("pmcid", ""),
-                "doi": hit.get("doi", ""),
-                "title": hit.get("title", ""),
-                "year": hit.get("year", 0),
-                "journal": hit.get("journal", ""),
-                "source_url": hit.get("source_url", ""),
-                "rank": hit.get("rank", i),
-                "score": hit.get("score", None),
-                "node_id": node_id,
-            }
-            extractions.append(extracted_obj)
-        except Exception as e:
-            print(f"[ARTICLE][extract error] {e}")
-            extractions.append({
-                "_error": str(e),
-                "_provenance": {
-                    "pmcid": hit.get("pmcid", ""),
-                    "title": hit.get("title", ""),
-                    "rank": hit.get("rank", i),
-                    "node_id": node_id,
-                }
-            })
+    tasks = [
+        (hit,
+         USER_INSTRUCTION_PREFIX
+         + (fulltext_by_node.get(hit.get("id")) or hit.get("text_preview", ""))
+         + USER_INSTRUCTION_SUFFIX,
+         i)
+        for i, hit in enumerate(query_hits[:max_chunks_for_extraction], start=1)
+    ]
+    extractions = _extract_concurrently(
+        tasks, extraction_schema, SYSTEM_PROMPT, neb_url, neb_headers,
+        max_tokens=600,
+    )
 
     print(f"[ARTICLE] Completed {len(extractions)}/{max_chunks_for_extraction} chunk extractions.")
 
@@ -1945,14 +2895,18 @@ def article_generate_from_chunks(query: Optional[str] = None, top_k: int = 100,
 
     print(f"[ARTICLE] Generating HTML article for protein={protein_name!r} using {NEBIUS_MODEL}")
     try:
+        abody, ahdrs = _gzip_body(
+            orjson.dumps(article_payload),
+            {
+                "Authorization": f"Bearer {settings.nebius_api_key}",
+                "Content-Type": "application/json",
+            },
+        )
         with httpx.Client(timeout=120) as neb_client:
             aresp = neb_client.post(
                 f"{NEBIUS_BASE_URL}chat/completions",
-                json=article_payload,
-                headers={
-                    "Authorization": f"Bearer {settings.nebius_api_key}",
-                    "Content-Type": "application/json",
-                },
+                content=abody,
+                headers=ahdrs,
             )
         print(f"[ARTICLE] HTTP {aresp.status_code}")
 
@@ -1998,7 +2952,7 @@ def index_run_all(batch_size: int = 1000, protein_name: str = "APOE", query: Opt
     if not os.path.isdir(PAPERS_DIR):
         return {"status": "ok", "note": f"Folder '{PAPERS_DIR}' not found", "indexed": 0}
 
-    all_files = [fn for fn in os.listdir(PAPERS_DIR) if fn.endswith(".json")]
+    all_files = _list_papers(os.stat(PAPERS_DIR).st_mtime)
     total = len(all_files)
     if total == 0:
         return {"status": "ok", "note": "No JSON files in papers/", "indexed": 0}
@@ -2019,6 +2973,24 @@ def index_run_all(batch_size: int = 1000, protein_name: str = "APOE", query: Opt
     print("[RUN-ALL] Done.")
     return {"status": "ok", "indexed": processed, "total": total}
 
+
+@app.post("/index/flush")
+def index_flush():
+    """
+    Force a checkpoint of the live FAISS index to disk.
+
+    Batches normally defer the expensive write_index until FAISS_FLUSH_ROWS
+    new vectors accumulate (see _flush_live_index); call this before stopping
+    the server mid-ingest or when another process needs the file current.
+    """
+    faiss_path = os.path.join(FAISS_DIR, "index.faiss")
+    index = _load_live_index(faiss_path)
+    if index is None:
+        return {"status": "ok", "note": "no index in memory or on disk"}
+    flushed = _flush_live_index(faiss_path, force=True)
+    return {"status": "ok", "flushed": flushed, "ntotal": int(index.ntotal)}
+
+
 @app.get("/harvest/{protein_name}")
 def harvest_protein(protein_name: str, limit: int = 1):
     """
@@ -2296,8 +3268,7 @@ def papers_cleanup_refonly(protein: str = "APOE"):
         print(f"[CLEANUP] Folder '{PAPERS_DIR}' not found.")
         return {"status": "ok"}
 
-    files = [os.path.join(PAPERS_DIR, fn) for fn in os.listdir(PAPERS_DIR) if fn.endswith(".json")]
-    files.sort()
+    files = _list_papers(os.stat(PAPERS_DIR).st_mtime)
     total = len(files)
     print(f"[CLEANUP] Scanning {total} JSON files for '{term}' occurrences limited to references...")
 
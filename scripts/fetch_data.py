@@ -5,15 +5,22 @@ Core data access helpers for external biological datasets.
 from __future__ import annotations
 
 import io, re
+import logging
 import zipfile
 import time
 import requests
+import numpy as np
 import pandas as pd
 from collections.abc import Iterable
 
+logger = logging.getLogger(__name__)
+
 BASE_SEARCH = "https://rest.uniprot.org/uniprotkb/search"
 BASE_ENTRY  = "https://rest.uniprot.org/uniprotkb"  # /{accession}
 
+# UniProt accession format (e.g. P12345, Q9NR56, A0A024R161); see uniprot.org/help/accession_numbers
+_ACC_RE = re.compile(r"^(?:[OPQ][0-9][A-Z0-9]{3}[0-9]|[A-NR-Z][0-9](?:[A-Z][A-Z0-9]{2}[0-9]){1,2})$")
+
 def _ensure_iterable(x):
     if isinstance(x, str):
         return [x]
@@ -54,31 +61,40 @@ def fetch_uniprot_data(genes: str | Iterable[str]) -> pd.DataFrame:
     genes = _ensure_iterable(genes)
     rows = []
 
+    # Restrict payloads to just what we parse below; the full entry JSON is ~10x larger.
+    entry_fields = "accession,reviewed,protein_name,sequence,lit_pubmed_id,lit_doi_id,lit_title"
+
     for gene in genes:
-        print(f"Fetching UniProt data for {gene}")
-        # 1) Search: get the best accession for Homo sapiens
-        params = {
-            "query": f'gene_exact:{gene} AND organism_id:9606',
-            "format": "json",
-            "size": 5,  # get a few, we'll choose reviewed if available
-            # keep fields minimal; we just need accession & a name for logging
-            "fields": "accession,reviewed,protein_name"
-        }
+        logger.info("Fetching UniProt data for %s", gene)
         try:
-            s = requests.get(BASE_SEARCH, params=params, timeout=30)
-            s.raise_for_status()
-            hits = s.json().get("results", [])
-            hit = _best_hit(hits)
-            if not hit:
-                print(f"✗ No UniProt result for {gene}")
-                continue
-
-            acc = hit["primaryAccession"]
-
-            # 2) Retrieve full entry JSON by accession (rich, includes references)
-            e = requests.get(f"{BASE_ENTRY}/{acc}.json", timeout=30)
-            e.raise_for_status()
-            entry = e.json()
+            if _ACC_RE.match(gene):
+                # Input is already an accession: skip the search hop entirely
+                acc = gene
+                e = requests.get(
+                    f"{BASE_ENTRY}/{acc}.json",
+                    params={"fields": entry_fields},
+                    timeout=30,
+                )
+                e.raise_for_status()
+                entry = e.json()
+            else:
+                # Single search call with a field projection: the compact response
+                # already carries sequence + reference citations, so no entry fetch.
+                params = {
+                    "query": f'gene_exact:{gene} AND organism_id:9606',
+                    "format": "json",
+                    "size": 5,  # get a few, we'll choose reviewed if available
+                    "fields": entry_fields,
+                }
+                s = requests.get(BASE_SEARCH, params=params, timeout=30)
+                s.raise_for_status()
+                hits = s.json().get("results", [])
+                entry = _best_hit(hits)
+                if not entry:
+                    logger.info("✗ No UniProt result for %s", gene)
+                    continue
+
+                acc = entry["primaryAccession"]
 
             # basic protein info (be tolerant to missing nested keys)
             protein_name = (
@@ -114,7 +130,7 @@ def fetch_uniprot_data(genes: str | Iterable[str]) -> pd.DataFrame:
             time.sleep(0.1)  # courtesy delay
 
         except requests.RequestException as exc:
-            print(f"⚠ UniProt request failed for {gene}: {exc}")
+            logger.warning("⚠ UniProt request failed for %s: %s", gene, exc)
 
     return pd.DataFrame(rows)
 
@@ -129,7 +145,7 @@ def fetch_genage_data(genes: str | Iterable[str] | None = None, zip_url: str = "
     Returns:
         pandas.DataFrame | None: DataFrame of GenAge data (filtered if genes provided).
     """
-    print(f"Downloading GenAge data from: {zip_url}")
+    logger.info("Downloading GenAge data from: %s", zip_url)
 
     try:
         # Download and extract CSV
@@ -145,22 +161,23 @@ def fetch_genage_data(genes: str | Iterable[str] | None = None, zip_url: str = "
         if genes:
             gene_queries = _ensure_iterable(genes)
 
-            def row_matches(row: pd.Series) -> bool:
-                row_strs = row.astype(str)
-                return any(row_strs.str.contains(query, case=False, na=False).any() for query in gene_queries)
-
-            mask = df.apply(row_matches, axis=1)
+            # One regex over tab-joined rows of a single object-array: avoids the
+            # per-row Series allocation of df.apply(..., axis=1).
+            pattern = re.compile("|".join(re.escape(q) for q in gene_queries), re.IGNORECASE)
+            arr = df.astype(str).to_numpy()
+            joined = ["\t".join(row) for row in arr]
+            mask = np.fromiter((pattern.search(s) is not None for s in joined), dtype=bool, count=len(joined))
             df = df.loc[mask]
 
             if df.empty:
                 queries = ", ".join(gene_queries)
-                print(f"No results found for gene query: {queries!r}")
+                logger.info("No results found for gene query: %r", queries)
                 return None
 
-            print(f"Found {len(df)} entries matching query set: {gene_queries}")
+            logger.info("Found %d entries matching query set: %s", len(df), gene_queries)
 
         return df
 
     except Exception as e:
-        print(f"Error fetching GenAge data: {e}")
+        logger.warning("Error fetching GenAge data: %s", e)
         return None
@@ -6,7 +6,7 @@ import csv
 import httpx
 import json
 import re
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional
 from llama_index.core import Document, VectorStoreIndex, StorageContext
 from llama_index.vector_stores.chroma import ChromaVectorStore
 import chromadb
@@ -30,43 +30,36 @@ def setup_chromadb():
     collection = chroma_client.get_or_create_collection(name=COLLECTION_NAME)
     return collection
 
-def load_genage_data(csv_file_path: str) -> List[Document]:
-    """Load GenAge human data from CSV file."""
-    documents = []
-    
+def load_genage_data(csv_file_path: str) -> Iterator[Document]:
+    """Stream GenAge human data from CSV file, one Document per row."""
     if not os.path.exists(csv_file_path):
         print(f"⚠️  File not found: {csv_file_path}")
-        return documents
-    
+        return
+
     with open(csv_file_path, mode='r', encoding='utf-8') as file:
-        csv_reader = csv.reader(file)
-        header = next(csv_reader)  # Skip the header row
-        
-        for row in csv_reader:
-            print("reading row")
-            if len(row) < 6:  # Ensure we have enough columns
-                continue
-                
+        # DictReader + yield: rows go straight into the index consumer without
+        # an intermediate list, and columns are addressed by header name.
+        for row in csv.DictReader(file):
+            symbol = row.get("symbol", "")
+            full_name = row.get("name", "")
+            reason = row.get("why", "")
+
             text_content = (
-                f"Gene Symbol: {row[1]}, "
-                f"Full Name: {row[2]}, "
-                f"Reason for Inclusion: {row[5]}"
+                f"Gene Symbol: {symbol}, "
+                f"Full Name: {full_name}, "
+                f"Reason for Inclusion: {reason}"
             )
-            
-            doc = Document(
+
+            yield Document(
                 text=text_content,
                 metadata={
-                    "gene_symbol": row[1],
-                    "genage_id": row[0],
+                    "gene_symbol": symbol,
+                    "genage_id": row.get("GenAge ID", ""),
                     "source": "genage",
-                    "full_name": row[2],
-                    "reason": row[5]
+                    "full_name": full_name,
+                    "reason": reason
                 }
             )
-            documents.append(doc)
-    
-    print(f"✅ Loaded {len(documents)} GenAge documents")
-    return documents
 
 def load_uniprot_data(csv_file_path: str) -> List[Document]:
     """Load UniProt sequence data from CSV file."""
@@ -308,8 +301,8 @@ def main():
     
     # Load GenAge data
     print("\n📊 Loading GenAge data...")
-    genage_docs = load_genage_data("data/raw/genage_human.csv")
-    all_documents.extend(genage_docs)
+    all_documents.extend(load_genage_data("data/raw/genage_human.csv"))
+    print(f"✅ Loaded {len(all_documents)} GenAge documents")
     
     # Load UniProt data
     print("\n🧬 Loading UniProt data...")
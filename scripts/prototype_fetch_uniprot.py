@@ -1,9 +1,13 @@
 # filename: fetch_uniprot.py
 # Description: Fetches protein data from UniProt for a given list of gene names.
 
+import logging
+import time
+
 import requests
 import pandas as pd
-import time
+
+logger = logging.getLogger(__name__)
 
 def fetch_uniprot_data(gene_list: list):
     """
@@ -18,7 +22,7 @@ def fetch_uniprot_data(gene_list: list):
     base_url = "https://rest.uniprot.org/uniprotkb/search"
     protein_data = []
 
-    print(f"Fetching data for {len(gene_list)} genes from UniProt...")
+    logger.info("Fetching data for %d genes from UniProt...", len(gene_list))
 
     for gene in gene_list:
         query = f'(gene:"{gene}") AND (organism_id:9606)' # 9606 is the taxon ID for Homo sapiens
@@ -43,19 +47,20 @@ def fetch_uniprot_data(gene_list: list):
                     "sequence": result.get("sequence", {}).get("value")
                 }
                 protein_data.append(protein_info)
-                print(f"  ✅ Found data for {gene}")
+                logger.info("  ✅ Found data for %s", gene)
             else:
-                print(f"  ❌ No result found for {gene}")
+                logger.info("  ❌ No result found for %s", gene)
             
             time.sleep(0.1) # Be respectful to the API by adding a small delay
 
         except requests.exceptions.RequestException as e:
-            print(f"  An error occurred for gene {gene}: {e}")
+            logger.warning("  An error occurred for gene %s: %s", gene, e)
 
-    print("\n✅ UniProt fetching complete!")
+    logger.info("✅ UniProt fetching complete!")
     return pd.DataFrame(protein_data)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     # --- How to use the script ---
     # Uniprot is the comprehensive and list every protein that exists, 
     # regardless of its function. If a protein is known, it's in UniProt